@@ -4,6 +4,8 @@ Uses SQLAlchemy with async support for PostgreSQL/SQLite
 """
 
 import asyncio
+import hashlib
+import hmac
 import logging
 import os
 import re
@@ -11,10 +13,11 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import AsyncGenerator
 
-from sqlalchemy import Boolean, Column, DateTime, Float, Integer, String, Text, func, text
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String, Text, func, or_, text, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.future import select
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import declarative_base, make_transient, sessionmaker
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -130,6 +133,14 @@ async def init_db(max_retries: int = 3, retry_delay: float = 5.0) -> None:
             # Run migrations for new columns (separate connection)
             async with engine.begin() as conn:
                 await run_migrations(conn)
+            async with engine.begin() as conn:
+                await run_search_migrations(conn)
+            async with engine.begin() as conn:
+                await seed_marketplace_stats(conn)
+            async with engine.begin() as conn:
+                await backfill_api_key_hashes(conn)
+            async with engine.begin() as conn:
+                await backfill_service_ratings(conn)
             logger.info("Database initialized successfully")
             return
         except asyncio.TimeoutError:
@@ -169,17 +180,123 @@ async def run_migrations(conn) -> None:
         "ALTER TABLE services ADD COLUMN IF NOT EXISTS example_response TEXT",
         # Soft delete (added 2026-02-05)
         "ALTER TABLE services ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP",
+        # Indexes for list/filter queries (lower() matches the DAL filters)
+        "CREATE INDEX IF NOT EXISTS idx_services_category_lower ON services (lower(category))",
+        "CREATE INDEX IF NOT EXISTS idx_services_provider_lower ON services (lower(provider_wallet))",
+        "CREATE INDEX IF NOT EXISTS idx_services_created_at ON services (created_at DESC)",
+        # One review per agent per service, enforced by the database.
+        # Keep each agent's earliest review so existing duplicates don't block the index.
+        "DELETE FROM feedback f USING feedback g "
+        "WHERE f.service_id = g.service_id AND f.agent_id = g.agent_id "
+        "AND (f.created_at, f.id) > (g.created_at, g.id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_feedback_service_agent ON feedback (service_id, agent_id)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_service_created ON feedback (service_id, created_at DESC)",
+        # API keys: indexed prefix + hash instead of plaintext lookup
+        "ALTER TABLE agents ADD COLUMN IF NOT EXISTS api_key_prefix VARCHAR",
+        "ALTER TABLE agents ADD COLUMN IF NOT EXISTS api_key_hash VARCHAR",
+        "CREATE INDEX IF NOT EXISTS ix_agents_api_key_prefix ON agents (api_key_prefix)",
+        # Running review totals (NULL until backfilled from feedback)
+        "ALTER TABLE services ADD COLUMN IF NOT EXISTS rating_count INTEGER",
+        "ALTER TABLE services ADD COLUMN IF NOT EXISTS rating_sum INTEGER",
+        # Composite index for the verified-purchase check on reviews
+        "CREATE INDEX IF NOT EXISTS idx_transactions_buyer_service ON transactions (buyer_wallet, service_id)",
+        # Per-wallet history, newest first (GET /transactions/mine)
+        "CREATE INDEX IF NOT EXISTS idx_transactions_buyer_created ON transactions (buyer_wallet, created_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_transactions_seller_created ON transactions (seller_wallet, created_at DESC)",
     ]
     
     for sql in migrations:
         try:
-            await conn.execute(text(sql))
+            # Savepoint per statement: a failure rolls back only that statement
+            # instead of aborting the rest of the migration transaction
+            async with conn.begin_nested():
+                await conn.execute(text(sql))
             logger.info(f"Migration executed: {sql[:60]}...")
         except Exception as e:
             # Log at WARNING so we can see if migrations are failing
             logger.warning(f"Migration failed: {sql[:60]}... Error: {e}")
 
 
+async def run_search_migrations(conn) -> None:
+    """
+    Create trigram indexes so substring search (ILIKE '%q%') doesn't scan the table.
+    Runs in its own transaction: pg_trgm needs extension privileges the app role
+    may not have, and search still works (unindexed) without it.
+    """
+    if not IS_POSTGRES:
+        return
+    
+    try:
+        async with conn.begin_nested():
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_services_name_trgm ON services USING gin (name gin_trgm_ops)"
+            ))
+            await conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_services_description_trgm ON services USING gin (description gin_trgm_ops)"
+            ))
+        logger.info("Search trigram indexes ready")
+    except Exception as e:
+        logger.warning(f"Search trigram indexes skipped, search will scan services: {e}")
+
+
+async def seed_marketplace_stats(conn) -> None:
+    """
+    Create the marketplace_stats row on first run, backfilled from services.
+    After this the counters are maintained incrementally by the DAL.
+    """
+    try:
+        existing = await conn.execute(text("SELECT 1 FROM marketplace_stats WHERE singleton_id = 1"))
+        if existing.first():
+            return
+        await conn.execute(text(
+            "INSERT INTO marketplace_stats (singleton_id, total_services, total_calls, total_revenue_usdc) "
+            "SELECT 1, COUNT(*), COALESCE(SUM(calls_count), 0), COALESCE(SUM(revenue_usdc), 0) "
+            "FROM services WHERE deleted_at IS NULL"
+        ))
+        logger.info("Marketplace stats seeded from services table")
+    except Exception as e:
+        # Another worker may have seeded it concurrently
+        logger.warning(f"Marketplace stats seed skipped: {e}")
+
+
+async def backfill_api_key_hashes(conn) -> None:
+    """
+    Move legacy plaintext API keys to prefix + hash storage.
+    Idempotent - only touches rows that still hold a plaintext key.
+    """
+    try:
+        result = await conn.execute(text("SELECT id, api_key FROM agents WHERE api_key IS NOT NULL"))
+        rows = result.all()
+        for agent_id, api_key in rows:
+            await conn.execute(
+                text("UPDATE agents SET api_key_prefix = :prefix, api_key_hash = :hash, api_key = NULL WHERE id = :id"),
+                {"prefix": api_key_prefix(api_key), "hash": hash_api_key(api_key), "id": agent_id},
+            )
+        if rows:
+            logger.info(f"Hashed {len(rows)} legacy plaintext API key(s)")
+    except Exception as e:
+        logger.warning(f"API key backfill failed: {e}")
+
+
+async def backfill_service_ratings(conn) -> None:
+    """
+    Fill services.rating_count / rating_sum from existing feedback.
+    Idempotent - only touches rows where the totals were never set.
+    """
+    try:
+        result = await conn.execute(text(
+            "UPDATE services SET "
+            "rating_count = (SELECT COUNT(*) FROM feedback WHERE feedback.service_id = services.id), "
+            "rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM feedback WHERE feedback.service_id = services.id) "
+            "WHERE rating_count IS NULL"
+        ))
+        if result.rowcount:
+            logger.info(f"Backfilled rating totals for {result.rowcount} service(s)")
+    except Exception as e:
+        logger.warning(f"Service rating backfill failed: {e}")
+
+
 # ============ MODELS ============
 
 
@@ -188,7 +305,9 @@ class AgentDB(Base):
     __tablename__ = "agents"
 
     id = Column(String, primary_key=True)
-    api_key = Column(String, unique=True, index=True)
+    api_key = Column(String, unique=True, index=True)  # Legacy plaintext key - cleared by backfill
+    api_key_prefix = Column(String, index=True)  # First API_KEY_PREFIX_LEN chars, for lookup
+    api_key_hash = Column(String)  # BLAKE2b of the full key
     name = Column(String, nullable=False)
     wallet_address = Column(String, nullable=False, index=True)
     description = Column(Text)
@@ -220,6 +339,9 @@ class ServiceDB(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     calls_count = Column(Integer, default=0)
     revenue_usdc = Column(Float, default=0.0)
+    # Running review totals, maintained by create_feedback (average = sum / count)
+    rating_count = Column(Integer, default=0)
+    rating_sum = Column(Integer, default=0)
     # Service storefront fields (optional - help buyers understand how to use)
     usage_instructions = Column(Text, nullable=True)  # Markdown: how to call this service
     input_schema = Column(Text, nullable=True)  # JSON Schema for request body
@@ -229,6 +351,12 @@ class ServiceDB(Base):
     deleted_at = Column(DateTime, nullable=True)  # Soft delete timestamp
 
 
+# Expression indexes so case-insensitive filters and newest-first listing are index seeks
+Index("idx_services_category_lower", func.lower(ServiceDB.category))
+Index("idx_services_provider_lower", func.lower(ServiceDB.provider_wallet))
+Index("idx_services_created_at", ServiceDB.created_at.desc())
+
+
 class TransactionDB(Base):
     """Service call transaction log."""
     __tablename__ = "transactions"
@@ -246,6 +374,11 @@ class TransactionDB(Base):
     error = Column(Text)
 
 
+Index("idx_transactions_buyer_service", TransactionDB.buyer_wallet, TransactionDB.service_id)
+Index("idx_transactions_buyer_created", TransactionDB.buyer_wallet, TransactionDB.created_at.desc())
+Index("idx_transactions_seller_created", TransactionDB.seller_wallet, TransactionDB.created_at.desc())
+
+
 class FeedbackDB(Base):
     """Service feedback/reputation."""
     __tablename__ = "feedback"
@@ -259,6 +392,20 @@ class FeedbackDB(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+Index("uq_feedback_service_agent", FeedbackDB.service_id, FeedbackDB.agent_id, unique=True)
+Index("idx_feedback_service_created", FeedbackDB.service_id, FeedbackDB.created_at.desc())
+
+
+class MarketplaceStatsDB(Base):
+    """Denormalized marketplace counters (single row, singleton_id=1)."""
+    __tablename__ = "marketplace_stats"
+
+    singleton_id = Column(Integer, primary_key=True, default=1)
+    total_services = Column(Integer, default=0)  # Excludes soft-deleted services
+    total_calls = Column(Integer, default=0)
+    total_revenue_usdc = Column(Float, default=0.0)
+
+
 class MintCostDB(Base):
     """ERC-8004 minting cost tracking for unit economics."""
     __tablename__ = "mint_costs"
@@ -295,13 +442,30 @@ class MintCostDB(Base):
 # ============ AGENT OPERATIONS ============
 
 
+API_KEY_PREFIX_LEN = 12
+
+
+def api_key_prefix(api_key: str) -> str:
+    """Indexed lookup prefix of an API key."""
+    return api_key[:API_KEY_PREFIX_LEN]
+
+
+def hash_api_key(api_key: str) -> str:
+    """Hash an API key for storage (keys are 256-bit random, so no salt/stretching needed)."""
+    return hashlib.blake2b(api_key.encode(), digest_size=32).hexdigest()
+
+
 async def get_agent_by_api_key(api_key: str) -> AgentDB | None:
-    """Get agent by API key."""
+    """Get agent by API key (prefix lookup, constant-time hash compare)."""
+    key_hash = hash_api_key(api_key)
     async with get_session() as session:
         result = await session.execute(
-            select(AgentDB).where(AgentDB.api_key == api_key)
+            select(AgentDB).where(AgentDB.api_key_prefix == api_key_prefix(api_key))
         )
-        return result.scalar_one_or_none()
+        for agent in result.scalars():
+            if hmac.compare_digest(agent.api_key_hash or "", key_hash):
+                return agent
+        return None
 
 
 async def get_agent_by_wallet(wallet: str) -> AgentDB | None:
@@ -403,7 +567,9 @@ async def update_agent_api_key(wallet: str, new_api_key: str) -> bool:
         )
         agent = result.scalar_one_or_none()
         if agent:
-            agent.api_key = new_api_key
+            agent.api_key = None
+            agent.api_key_prefix = api_key_prefix(new_api_key)
+            agent.api_key_hash = hash_api_key(new_api_key)
             await session.commit()
             return True
         return False
@@ -431,9 +597,9 @@ async def get_services(
     async with get_session() as session:
         query = select(ServiceDB).where(ServiceDB.deleted_at.is_(None))
         if category:
-            query = query.where(ServiceDB.category == category)
+            query = query.where(func.lower(ServiceDB.category) == category.lower())
         if provider_wallet:
-            query = query.where(ServiceDB.provider_wallet == provider_wallet.lower())
+            query = query.where(func.lower(ServiceDB.provider_wallet) == provider_wallet.lower())
         query = query.order_by(ServiceDB.created_at.desc()).limit(limit).offset(offset)
         result = await session.execute(query)
         return list(result.scalars().all())
@@ -448,17 +614,51 @@ async def get_all_services() -> list[ServiceDB]:
         return list(result.scalars().all())
 
 
-async def count_services() -> int:
-    """Count total services."""
+async def count_services(category: str | None = None, provider_wallet: str | None = None) -> int:
+    """Count services with optional filters (excludes deleted, case-insensitive)."""
     async with get_session() as session:
-        result = await session.execute(select(func.count(ServiceDB.id)))
+        query = select(func.count(ServiceDB.id)).where(ServiceDB.deleted_at.is_(None))
+        if category:
+            query = query.where(func.lower(ServiceDB.category) == category.lower())
+        if provider_wallet:
+            query = query.where(func.lower(ServiceDB.provider_wallet) == provider_wallet.lower())
+        result = await session.execute(query)
         return result.scalar() or 0
 
 
+async def search_services_db(query: str, limit: int = 10) -> list[ServiceDB]:
+    """Case-insensitive substring search on name/description (excludes deleted)."""
+    # Escape LIKE wildcards so the query is matched literally
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = f"%{escaped}%"
+    async with get_session() as session:
+        result = await session.execute(
+            select(ServiceDB)
+            .where(ServiceDB.deleted_at.is_(None))
+            .where(or_(
+                ServiceDB.name.ilike(pattern, escape="\\"),
+                ServiceDB.description.ilike(pattern, escape="\\"),
+            ))
+            .order_by(ServiceDB.created_at.desc())
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+
+async def get_distinct_categories() -> list[str]:
+    """Get the distinct categories of listed services (excludes deleted)."""
+    async with get_session() as session:
+        result = await session.execute(
+            select(ServiceDB.category).where(ServiceDB.deleted_at.is_(None)).distinct()
+        )
+        return list(result.scalars().all())
+
+
 async def create_service(service: ServiceDB) -> ServiceDB:
     """Create a new service."""
     async with get_session() as session:
         session.add(service)
+        await _bump_marketplace_stats(session, services_delta=1)
         await session.commit()
         await session.refresh(service)
         return service
@@ -492,6 +692,14 @@ async def delete_service_db(service_id: str) -> bool:
         if not service:
             return False
         
+        if service.deleted_at is None:
+            # Deleted services drop out of the marketplace totals
+            await _bump_marketplace_stats(
+                session,
+                services_delta=-1,
+                calls_delta=-(service.calls_count or 0),
+                revenue_delta=-(service.revenue_usdc or 0),
+            )
         service.deleted_at = datetime.utcnow()
         await session.commit()
         return True
@@ -511,9 +719,62 @@ async def update_service_stats(
         if service:
             service.calls_count = (service.calls_count or 0) + calls_delta
             service.revenue_usdc = (service.revenue_usdc or 0) + revenue_delta
+            # Deleted services were already subtracted from the marketplace totals
+            if service.deleted_at is None:
+                await _bump_marketplace_stats(session, calls_delta=calls_delta, revenue_delta=revenue_delta)
             await session.commit()
 
 
+# ============ MARKETPLACE STATS ============
+
+
+async def _bump_marketplace_stats(
+    session: AsyncSession,
+    services_delta: int = 0,
+    calls_delta: int = 0,
+    revenue_delta: float = 0.0
+) -> None:
+    """Apply deltas to the marketplace_stats row (caller commits, same transaction)."""
+    await session.execute(
+        update(MarketplaceStatsDB)
+        .where(MarketplaceStatsDB.singleton_id == 1)
+        .values(
+            total_services=MarketplaceStatsDB.total_services + services_delta,
+            total_calls=MarketplaceStatsDB.total_calls + calls_delta,
+            total_revenue_usdc=MarketplaceStatsDB.total_revenue_usdc + revenue_delta,
+        )
+    )
+
+
+async def get_marketplace_stats() -> dict:
+    """
+    Get marketplace totals in a single round trip: the counters row, distinct
+    provider/category counts and the agent count, as scalar subqueries.
+    """
+    active = ServiceDB.deleted_at.is_(None)
+    singleton = MarketplaceStatsDB.singleton_id == 1
+    async with get_session() as session:
+        result = await session.execute(
+            select(
+                select(MarketplaceStatsDB.total_services).where(singleton).scalar_subquery().label("services"),
+                select(MarketplaceStatsDB.total_calls).where(singleton).scalar_subquery().label("calls"),
+                select(MarketplaceStatsDB.total_revenue_usdc).where(singleton).scalar_subquery().label("revenue"),
+                select(func.count(func.distinct(ServiceDB.provider_name))).where(active).scalar_subquery().label("providers"),
+                select(func.count(func.distinct(ServiceDB.category))).where(active).scalar_subquery().label("categories"),
+                select(func.count(AgentDB.id)).scalar_subquery().label("agents"),
+            )
+        )
+        row = result.one()
+        return {
+            "total_services": row.services or 0,
+            "total_agents": row.agents or 0,
+            "total_providers": row.providers or 0,
+            "categories": row.categories or 0,
+            "total_calls": row.calls or 0,
+            "total_revenue_usdc": float(row.revenue or 0),
+        }
+
+
 # ============ TRANSACTION LOGGING ============
 
 
@@ -524,6 +785,63 @@ async def log_transaction(tx: TransactionDB) -> None:
         await session.commit()
 
 
+# Transactions from the proxy endpoints are queued and written in batches by
+# a background task, keeping the DB write off the request path.
+TX_BATCH_SIZE = 100
+_tx_queue: asyncio.Queue[TransactionDB | None] = asyncio.Queue()
+
+
+def queue_transaction(tx: TransactionDB) -> None:
+    """Queue a transaction for the background writer (never blocks)."""
+    _tx_queue.put_nowait(tx)
+
+
+async def run_transaction_writer() -> None:
+    """
+    Background task that persists queued transactions.
+    
+    Waits for one row, then drains whatever else is already queued (up to
+    TX_BATCH_SIZE) into a single commit - idle traffic is written immediately,
+    bursts are written in batches. A None sentinel flushes and stops the writer.
+    """
+    while True:
+        batch = [await _tx_queue.get()]
+        while len(batch) < TX_BATCH_SIZE and not _tx_queue.empty():
+            batch.append(_tx_queue.get_nowait())
+
+        rows = [tx for tx in batch if tx is not None]
+        if rows:
+            try:
+                async with get_session() as session:
+                    session.add_all(rows)
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"Batch write of {len(rows)} transaction(s) failed, retrying individually: {e}")
+                await _write_transactions_individually(rows)
+
+        if len(rows) < len(batch):
+            return
+
+
+async def _write_transactions_individually(rows: list[TransactionDB]) -> None:
+    """Fallback for a failed batch: one bad row (e.g. duplicate id) only drops itself."""
+    for tx in rows:
+        # Detach from the rolled-back batch session so it can be added again
+        make_transient(tx)
+        try:
+            async with get_session() as session:
+                session.add(tx)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to write transaction {tx.id}: {e}")
+
+
+async def stop_transaction_writer(writer: asyncio.Task) -> None:
+    """Flush queued transactions and wait for the writer to exit."""
+    _tx_queue.put_nowait(None)
+    await writer
+
+
 # ============ MINT COST TRACKING ============
 
 
@@ -596,13 +914,13 @@ async def has_purchased_service(buyer_wallet: str, service_id: str) -> bool:
     """Check if a buyer has completed a purchase of a service."""
     async with get_session() as session:
         result = await session.execute(
-            select(TransactionDB)
+            select(TransactionDB.id)
             .where(TransactionDB.buyer_wallet == buyer_wallet.lower())
             .where(TransactionDB.service_id == service_id)
             .where(TransactionDB.status == "completed")
             .limit(1)
         )
-        return result.scalar_one_or_none() is not None
+        return result.first() is not None
 
 
 async def get_purchase_count(buyer_wallet: str, service_id: str) -> int:
@@ -620,66 +938,81 @@ async def get_purchase_count(buyer_wallet: str, service_id: str) -> int:
 # ============ FEEDBACK/REVIEWS ============
 
 
-async def create_feedback(feedback: FeedbackDB) -> FeedbackDB:
-    """Create a new feedback entry."""
+async def create_feedback(feedback: FeedbackDB) -> FeedbackDB | None:
+    """
+    Create a new feedback entry.
+    
+    Returns None if this agent already reviewed the service - the unique
+    index rejects the insert, so no separate lookup is needed.
+    """
     async with get_session() as session:
         session.add(feedback)
-        await session.commit()
+        try:
+            # Same transaction as the insert, so the totals never count a rejected review
+            await session.execute(
+                update(ServiceDB)
+                .where(ServiceDB.id == feedback.service_id)
+                .values(
+                    rating_count=func.coalesce(ServiceDB.rating_count, 0) + 1,
+                    rating_sum=func.coalesce(ServiceDB.rating_sum, 0) + feedback.rating,
+                )
+            )
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return None
         await session.refresh(feedback)
         return feedback
 
 
-async def get_feedback_for_service(service_id: str) -> list[FeedbackDB]:
-    """Get all feedback for a service."""
+async def get_feedback_for_service(service_id: str, limit: int | None = None) -> list[FeedbackDB]:
+    """Get feedback for a service, newest first (optionally only the newest `limit`)."""
     async with get_session() as session:
         result = await session.execute(
             select(FeedbackDB)
             .where(FeedbackDB.service_id == service_id)
             .order_by(FeedbackDB.created_at.desc())
+            .limit(limit)
         )
         return list(result.scalars().all())
 
 
-async def has_reviewed_service(agent_id: str, service_id: str) -> bool:
-    """Check if an agent has already reviewed a service."""
-    async with get_session() as session:
-        result = await session.execute(
-            select(FeedbackDB)
-            .where(FeedbackDB.agent_id == agent_id)
-            .where(FeedbackDB.service_id == service_id)
-            .limit(1)
-        )
-        return result.scalar_one_or_none() is not None
+def rating_summary(rating_count: int | None, rating_sum: int | None) -> dict:
+    """Review count and average from a service's running totals."""
+    count = rating_count or 0
+    return {
+        "review_count": count,
+        "average_rating": round((rating_sum or 0) / count, 1) if count else None,
+    }
 
 
 async def get_service_rating_summary(service_id: str) -> dict:
-    """Get aggregate rating for a service."""
+    """Get aggregate rating for a service (O(1) - reads the running totals)."""
     async with get_session() as session:
         result = await session.execute(
-            select(
-                func.count(FeedbackDB.id).label("count"),
-                func.avg(FeedbackDB.rating).label("avg_rating")
-            )
-            .where(FeedbackDB.service_id == service_id)
+            select(ServiceDB.rating_count, ServiceDB.rating_sum).where(ServiceDB.id == service_id)
         )
-        row = result.one()
-        return {
-            "review_count": row.count or 0,
-            "average_rating": round(float(row.avg_rating), 1) if row.avg_rating else None
-        }
+        row = result.first()
+        return rating_summary(row.rating_count, row.rating_sum) if row else rating_summary(0, 0)
 
 
 async def get_transactions_by_wallet(wallet_address: str, limit: int = 20) -> list[TransactionDB]:
-    """Get transactions where wallet is buyer or seller."""
+    """
+    Get transactions where wallet is buyer or seller, newest first.
+
+    Takes the newest `limit` rows from each side (one index range scan each)
+    and merges them, instead of an OR that can't use either index for ordering.
+    """
     wallet_lower = wallet_address.lower()
     async with get_session() as session:
-        result = await session.execute(
-            select(TransactionDB)
-            .where(
-                (TransactionDB.buyer_wallet == wallet_lower) |
-                (TransactionDB.seller_wallet == wallet_lower)
+        by_side = []
+        for column in (TransactionDB.buyer_wallet, TransactionDB.seller_wallet):
+            result = await session.execute(
+                select(TransactionDB)
+                .where(column == wallet_lower)
+                .order_by(TransactionDB.created_at.desc())
+                .limit(limit)
             )
-            .order_by(TransactionDB.created_at.desc())
-            .limit(limit)
-        )
-        return list(result.scalars().all())
+            by_side.append(result.scalars().all())
+    merged = {tx.id: tx for side in by_side for tx in side}  # Dedupe self-purchases
+    return sorted(merged.values(), key=lambda tx: tx.created_at or datetime.min, reverse=True)[:limit]
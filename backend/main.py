@@ -3,25 +3,32 @@ MoltMart Backend - Service Registry for AI Agents
 x402-native marketplace for agent services
 """
 
+import asyncio
 import base64
+import bisect
 import hashlib
 import hmac
-import json
+import itertools
 import os
 import re
 import secrets
 import time
 import uuid
-from collections import defaultdict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 
 import httpx
+import orjson
+from cachetools import TTLCache
+from cachetools.func import ttl_cache
 from eth_account import Account
 from eth_account.messages import encode_defunct
 from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, HttpUrl, validator
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl, validator
 
 # Rate limiting
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -41,7 +48,9 @@ from database import (
     ServiceDB,
     TransactionDB,
     FeedbackDB,
+    api_key_prefix,
     count_agents,
+    count_services,
     create_agent,
     create_feedback,
     create_service,
@@ -50,16 +59,20 @@ from database import (
     get_agent_by_wallet,
     get_agent_by_8004_id,
     get_agents,
-    get_all_services,
+    get_distinct_categories,
     get_feedback_for_service,
+    get_marketplace_stats,
     get_service,
     get_service_rating_summary,
     get_services,
     get_transactions_by_wallet,
+    hash_api_key,
     has_purchased_service,
-    has_reviewed_service,
     init_db,
-    log_transaction,
+    queue_transaction,
+    search_services_db,
+    run_transaction_writer,
+    stop_transaction_writer,
     update_agent_8004_status,
     update_agent_api_key,
     update_service_db,
@@ -77,6 +90,7 @@ app = FastAPI(
     title="MoltMart API",
     description="The marketplace for AI agent services. List, discover, and pay with x402.",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -90,8 +104,8 @@ async def log_x402_requests(request: Request, call_next):
     if payment_header:
         print(f"🔐 x402 payment detected for {request.method} {request.url.path}")
         try:
-            import base64
-            decoded = base64.b64decode(payment_header).decode()
+            # Only the logged prefix is decoded - call_service decodes the full payload
+            decoded = base64.b64decode(payment_header[:268]).decode(errors="replace")
             print(f"📦 Payment payload (first 200 chars): {decoded[:200]}...")
         except Exception as e:
             print(f"⚠️ Could not decode payment header: {e}")
@@ -106,18 +120,30 @@ async def log_x402_requests(request: Request, call_next):
     return response
 
 
-@app.middleware("http")
-async def fix_scheme_for_proxy(request: Request, call_next):
+class FixSchemeMiddleware:
     """
     Fix scheme for requests behind Railway/Vercel proxy.
     The proxy terminates TLS, so internal requests show as HTTP.
     Trust X-Forwarded-Proto header to get the real scheme.
+
+    Pure ASGI (no BaseHTTPMiddleware) - scans the raw header list and
+    passes the request through without building Request/Response objects.
     """
-    forwarded_proto = request.headers.get("x-forwarded-proto")
-    if forwarded_proto == "https":
-        # Mutate the scope to fix the scheme
-        request.scope["scheme"] = "https"
-    return await call_next(request)
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            for key, value in scope.get("headers", ()):
+                if key == b"x-forwarded-proto":
+                    if value == b"https":
+                        scope = {**scope, "scheme": "https"}
+                    break
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(FixSchemeMiddleware)
 
 
 # CORS for frontend - restrict to known origins
@@ -163,7 +189,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         msg = error["msg"]
         error_messages.append(f"{field}: {msg}")
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content={
             "error": "Validation error",
@@ -175,7 +201,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     """Handle HTTP exceptions with proper JSON response"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.detail if isinstance(exc.detail, str) else "HTTP error",
@@ -188,7 +214,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
 async def generic_exception_handler(request: Request, exc: Exception):
     """Handle unexpected exceptions with proper JSON response"""
     print(f"❌ Unexpected error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -217,12 +243,22 @@ MOLTMART_WALLET = os.getenv("MOLTMART_WALLET", "0x8b5625F01b286540AC9D8043E2d765
 # Our custom facilitator
 FACILITATOR_URL = os.getenv("FACILITATOR_URL", "https://facilitator.moltmart.app")
 
+# Public URL of this API (e.g. https://api.moltmart.app). When set, profile/mint
+# URLs are built from it instead of re-deriving request.base_url on every call.
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+
 # Pricing
 IDENTITY_MINT_PRICE = "$0.05"  # Pay to mint ERC-8004 identity
 LISTING_PRICE = "FREE"  # Service listing is free - reputation handles spam
 
-# Registration challenge message (agents sign this to prove wallet ownership)
-REGISTRATION_CHALLENGE = "MoltMart Registration: I own this wallet and have an ERC-8004 identity"
+# Registration challenge (agents sign this to prove wallet ownership).
+# Stateless: "MoltMart Registration v2 ts=<window start> tag=<hmac>", valid for
+# REGISTRATION_CHALLENGE_MAX_AGE_SECONDS. ts is aligned to a window so the server
+# can re-derive the signed message even when the client doesn't send it back.
+CHALLENGE_SECRET = os.getenv("CHALLENGE_SECRET", "").encode() or secrets.token_bytes(32)
+REGISTRATION_CHALLENGE_WINDOW_SECONDS = 300
+REGISTRATION_CHALLENGE_MAX_AGE_SECONDS = 600
+_REGISTRATION_CHALLENGE_RE = re.compile(r"^MoltMart Registration v2 ts=(\d+) tag=[0-9a-f]{16}$")
 
 # Rate limits
 SERVICES_PER_HOUR = 3
@@ -256,8 +292,27 @@ x402_routes: dict[str, RouteConfig] = {
     # Service listing removed from x402 - it's FREE now
 }
 
+
+class PreflightBypassPaymentMiddleware:
+    """
+    Wraps the x402 payment middleware so CORS preflights go straight through.
+
+    It sits outside CORSMiddleware, so without this every browser OPTIONS
+    request would go through the x402 route matching first.
+    """
+
+    def __init__(self, app, **payment_kwargs):
+        self.app = app
+        self.payment = PaymentMiddlewareASGI(app, **payment_kwargs)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        return await self.payment(scope, receive, send)
+
+
 # Add x402 payment middleware
-app.add_middleware(PaymentMiddlewareASGI, routes=x402_routes, server=x402_server)
+app.add_middleware(PreflightBypassPaymentMiddleware, routes=x402_routes, server=x402_server)
 
 
 # ============ DATABASE INITIALIZATION ============
@@ -265,28 +320,48 @@ app.add_middleware(PaymentMiddlewareASGI, routes=x402_routes, server=x402_server
 
 @app.on_event("startup")
 async def startup():
-    """Initialize database on startup"""
+    """Initialize database and start background workers on startup"""
     await init_db()
     print("✅ Database initialized")
+    if not PUBLIC_BASE_URL:
+        print("⚠️ PUBLIC_BASE_URL not set - deriving base URL from each request")
+    if not os.getenv("CHALLENGE_SECRET"):
+        print("⚠️ CHALLENGE_SECRET not set - using a random per-process secret; registration challenges won't survive restarts or work across instances")
+    app.state.tx_writer = asyncio.create_task(run_transaction_writer())
+    app.state.rate_limit_gc = asyncio.create_task(gc_rate_limits())
+    app.state.challenge_gc = asyncio.create_task(gc_challenges())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background workers and flush queued transaction logs before exit"""
+    app.state.rate_limit_gc.cancel()
+    app.state.challenge_gc.cancel()
+    await stop_transaction_writer(app.state.tx_writer)
+    await http_client.aclose()
+    _mint_executor.shutdown(wait=False)
 
 
 # ============ IN-MEMORY STORAGE (kept for rate limiting, will migrate later) ============
 
 services_db: dict = {}  # Deprecated - using database now
 agents_db: dict = {}  # Deprecated - using database now
-rate_limits: dict[str, list[float]] = defaultdict(list)  # api_key -> list of timestamps
+rate_limits: dict[str, deque[float]] = {}  # api_key -> listing timestamps (oldest first, bounded)
 
 # On-chain challenge storage: wallet -> {nonce, expires_at, target}
-onchain_challenges: dict[str, dict] = {}
+# Plain dict, not a size-bounded cache: these endpoints are unauthenticated, and a
+# flood of fake wallets must not evict live challenges. gc_challenges() sweeps
+# expired entries so abandoned challenges don't pile up.
 CHALLENGE_TTL_SECONDS = 600  # 10 minutes to complete the challenge
+onchain_challenges: dict[str, dict] = {}
 # Use an EOA for on-chain challenges - contracts may revert on arbitrary calldata
 # Default: Kyro's self-custody wallet (verified EOA)
 ONCHAIN_CHALLENGE_TARGET = os.getenv("ONCHAIN_CHALLENGE_TARGET", "0x90d9c75f3761c02Bf3d892A701846F6323e9112D")
 
 # On-chain PAYMENT challenge storage: wallet -> {nonce, amount, action, expires_at}
 # For Bankr/custodial wallets that can send USDC but can't sign x402
-payment_challenges: dict[str, dict] = {}
 PAYMENT_CHALLENGE_TTL_SECONDS = 600  # 10 minutes to complete payment
+payment_challenges: dict[str, dict] = {}  # Swept by gc_challenges(), same as above
 
 # USDC contract
 if USE_TESTNET:
@@ -295,6 +370,49 @@ else:
     USDC_CONTRACT = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"  # USDC on Base mainnet
 USDC_DECIMALS = 6
 
+# Shared HTTP client for facilitator and seller calls - keeps connections alive
+# across requests instead of paying a TCP+TLS handshake per call. HTTP/2 multiplexes
+# concurrent calls to the same host over one connection (h1-only hosts negotiate
+# down via ALPN). Closed on shutdown.
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=30.0,
+    limits=httpx.Limits(max_keepalive_connections=200, max_connections=400, keepalive_expiry=60.0),
+)
+
+# Payers that recently passed facilitator /verify for a service, bound to the
+# authenticated agent that presented them: (agent_id, payer, service_id) -> True.
+# Only that agent's repeat calls skip /verify and go straight to /settle, which still validates the
+# authorization on-chain - a bad payload fails there instead.
+VERIFY_CACHE_TTL_SECONDS = 60
+verify_cache: TTLCache = TTLCache(maxsize=10_000, ttl=VERIFY_CACHE_TTL_SECONDS)
+
+# Low-volatility aggregates: /stats and per-service /reviews (which also does an
+# on-chain reputation RPC). Reviews are invalidated when a review is submitted.
+AGGREGATE_CACHE_TTL_SECONDS = 30
+stats_cache: TTLCache = TTLCache(maxsize=1, ttl=AGGREGATE_CACHE_TTL_SECONDS)
+reviews_cache: TTLCache = TTLCache(maxsize=2048, ttl=AGGREGATE_CACHE_TTL_SECONDS)
+
+# Short-lived cache of service rows for read paths (proxy calls, service detail,
+# reviews, payment challenges) - absorbs bursts and the 402 -> paid retry pair
+# without a DB round trip. Invalidated on update/delete, which read the DB directly.
+SERVICE_CACHE_TTL_SECONDS = 2.0
+service_cache: TTLCache = TTLCache(maxsize=2048, ttl=SERVICE_CACHE_TTL_SECONDS)
+
+# Category churn is rare - a new category shows up in /categories within 30s
+CATEGORIES_CACHE_TTL_SECONDS = 30
+categories_cache: TTLCache = TTLCache(maxsize=1, ttl=CATEGORIES_CACHE_TTL_SECONDS)
+
+
+async def get_service_cached(service_id: str) -> ServiceDB | None:
+    """get_service() behind the short TTL service cache"""
+    service = service_cache.get(service_id)
+    if service is None:
+        service = await get_service(service_id)
+        if service is not None:
+            service_cache[service_id] = service
+    return service
+
 
 # ============ RATE LIMITING ============
 
@@ -306,14 +424,16 @@ def check_rate_limit(api_key: str) -> tuple[bool, dict | None]:
     day_ago = now - 86400
 
     # Get timestamps for this agent
-    timestamps = rate_limits[api_key]
+    timestamps = rate_limits.get(api_key)
+    if timestamps is None:
+        timestamps = rate_limits[api_key] = deque(maxlen=SERVICES_PER_DAY)
 
-    # Clean old entries
-    timestamps = [t for t in timestamps if t > day_ago]
-    rate_limits[api_key] = timestamps
+    # Clean old entries (oldest first, so stop at the first recent one)
+    while timestamps and timestamps[0] <= day_ago:
+        timestamps.popleft()
 
     # Count recent
-    hour_count = sum(1 for t in timestamps if t > hour_ago)
+    hour_count = len(timestamps) - bisect.bisect_right(timestamps, hour_ago)
     day_count = len(timestamps)
 
     if hour_count >= SERVICES_PER_HOUR:
@@ -339,11 +459,55 @@ def check_rate_limit(api_key: str) -> tuple[bool, dict | None]:
 
 def record_listing(api_key: str):
     """Record a service listing for rate limiting"""
-    rate_limits[api_key].append(time.time())
+    timestamps = rate_limits.get(api_key)
+    if timestamps is None:
+        timestamps = rate_limits[api_key] = deque(maxlen=SERVICES_PER_DAY)
+    timestamps.append(time.time())
+
+
+RATE_LIMIT_GC_INTERVAL_SECONDS = 3600
+
+
+async def gc_rate_limits():
+    """Background task: drop rate limit entries with no listings in the last day"""
+    while True:
+        await asyncio.sleep(RATE_LIMIT_GC_INTERVAL_SECONDS)
+        day_ago = time.time() - 86400
+        stale = [key for key, timestamps in rate_limits.items() if not timestamps or timestamps[-1] <= day_ago]
+        for key in stale:
+            del rate_limits[key]
+
+
+CHALLENGE_GC_INTERVAL_SECONDS = 60
+
+
+async def gc_challenges():
+    """Background task: drop on-chain and payment challenges past their expires_at"""
+    while True:
+        await asyncio.sleep(CHALLENGE_GC_INTERVAL_SECONDS)
+        now = time.time()
+        for challenges in (onchain_challenges, payment_challenges):
+            expired = [key for key, challenge in challenges.items() if challenge["expires_at"] < now]
+            for key in expired:
+                challenges.pop(key, None)
 
 
 # ============ MODELS ============
 
+# Compiled once - validators run on every register/mint/call payload
+_ETH_ADDR_RE = re.compile(r"^0x[a-fA-F0-9]{40}$")
+_TX_HASH_RE = re.compile(r"^0x[a-fA-F0-9]{64}$")
+
+
+def _check_json_value(v):
+    """Reject JSON orjson can't serialize (integers beyond 64 bits) at validation time"""
+    if v is not None:
+        try:
+            orjson.dumps(v)
+        except orjson.JSONEncodeError as e:
+            raise ValueError(f"Unsupported JSON value: {e}") from e
+    return v
+
 
 class AgentRegister(BaseModel):
     """Register a new agent - requires ERC-8004 proof"""
@@ -351,6 +515,7 @@ class AgentRegister(BaseModel):
     name: str
     wallet_address: str
     signature: str | None = None  # Off-chain signature of challenge message (use this OR tx_hash)
+    challenge: str | None = None  # Challenge that was signed (optional - defaults to the current one)
     tx_hash: str | None = None  # On-chain tx hash for custodial wallets (use this OR signature)
     erc8004_id: int | None = None  # Optional: provide your ERC-8004 token ID (we verify ownership)
     description: str | None = None
@@ -360,14 +525,14 @@ class AgentRegister(BaseModel):
     @validator("wallet_address")
     def validate_eth_address(cls, v):
         """Validate Ethereum address format"""
-        if not re.match(r"^0x[a-fA-F0-9]{40}$", v):
+        if not _ETH_ADDR_RE.match(v):
             raise ValueError("Invalid Ethereum address format")
         return v.lower()  # normalize to lowercase
     
     @validator("tx_hash")
     def validate_tx_hash(cls, v):
         """Validate transaction hash format"""
-        if v is not None and not re.match(r"^0x[a-fA-F0-9]{64}$", v):
+        if v is not None and not _TX_HASH_RE.match(v):
             raise ValueError("Invalid transaction hash format")
         return v.lower() if v else None
 
@@ -381,7 +546,7 @@ class IdentityMintRequest(BaseModel):
     @validator("wallet_address")
     def validate_eth_address(cls, v):
         """Validate Ethereum address format"""
-        if not re.match(r"^0x[a-fA-F0-9]{40}$", v):
+        if not _ETH_ADDR_RE.match(v):
             raise ValueError("Invalid Ethereum address format")
         return v.lower()
     
@@ -390,7 +555,7 @@ class IdentityMintRequest(BaseModel):
         """Validate transaction hash format"""
         if v is None:
             return v
-        if not re.match(r"^0x[a-fA-F0-9]{64}$", v):
+        if not _TX_HASH_RE.match(v):
             raise ValueError("Invalid transaction hash format")
         return v.lower()
 
@@ -427,6 +592,7 @@ class Agent(AgentRegister):
     created_at: datetime
     services_count: int = 0
     erc8004: ERC8004Credentials | None = None
+    challenge: str | None = Field(default=None, exclude=True)  # Registration input only - never returned
 
 
 class ServiceCreate(BaseModel):
@@ -444,6 +610,11 @@ class ServiceCreate(BaseModel):
     example_request: dict | None = None  # Example request body
     example_response: dict | None = None  # Example response body
 
+    @validator("input_schema", "output_schema", "example_request", "example_response")
+    def validate_json_fields(cls, v):
+        """Storefront JSON is stored via orjson - integers must fit in 64 bits"""
+        return _check_json_value(v)
+
 
 class Service(BaseModel):
     """Service stored in database"""
@@ -532,12 +703,13 @@ def db_service_to_response(db_service: ServiceDB) -> ServiceResponse:
     def parse_json_field(value: str | None) -> dict | None:
         if value:
             try:
-                return json.loads(value)
-            except json.JSONDecodeError:
+                return orjson.loads(value)
+            except orjson.JSONDecodeError:
                 return None
         return None
     
-    return ServiceResponse(
+    # Rows come from our own schema and were validated on write - skip re-validation
+    return ServiceResponse.model_construct(
         id=db_service.id,
         name=db_service.name,
         description=db_service.description,
@@ -558,11 +730,14 @@ def db_service_to_response(db_service: ServiceDB) -> ServiceResponse:
     )
 
 
-def db_agent_to_pydantic(db_agent: AgentDB) -> Agent:
-    """Convert database agent to Pydantic model"""
-    return Agent(
+def db_agent_to_pydantic(db_agent: AgentDB, api_key: str) -> Agent:
+    """
+    Convert database agent to Pydantic model (no re-validation - trusted DB row).
+    The DB only stores a hash, so the caller supplies the plaintext API key.
+    """
+    return Agent.model_construct(
         id=db_agent.id,
-        api_key=db_agent.api_key,
+        api_key=api_key,
         name=db_agent.name,
         wallet_address=db_agent.wallet_address,
         description=db_agent.description,
@@ -570,7 +745,7 @@ def db_agent_to_pydantic(db_agent: AgentDB) -> Agent:
         github_handle=db_agent.github_handle,
         created_at=db_agent.created_at,
         services_count=db_agent.services_count,
-        erc8004=ERC8004Credentials(
+        erc8004=ERC8004Credentials.model_construct(
             has_8004=db_agent.has_8004 or False,
             agent_id=db_agent.agent_8004_id,
             agent_registry=db_agent.agent_8004_registry,
@@ -588,7 +763,7 @@ async def get_current_agent(x_api_key: str = Header(None)) -> Agent | None:
     db_agent = await get_agent_by_api_key(x_api_key)
     if not db_agent:
         return None
-    return db_agent_to_pydantic(db_agent)
+    return db_agent_to_pydantic(db_agent, x_api_key)
 
 
 async def require_agent(x_api_key: str = Header(...)) -> Agent:
@@ -603,38 +778,54 @@ async def require_agent(x_api_key: str = Header(...)) -> Agent:
         raise HTTPException(
             status_code=401, detail="Invalid API key. Register at POST /agents/register to get a valid key."
         )
-    return db_agent_to_pydantic(db_agent)
+    return db_agent_to_pydantic(db_agent, x_api_key)
 
 
 # ============ ENDPOINTS ============
 
 
+# Pure constants - built once at import instead of per request
+ROOT_INFO = {
+    "name": "MoltMart API",
+    "version": "1.0.0",
+    "description": "The marketplace for AI agent services",
+    "x402_enabled": True,
+    "erc8004_required": True,
+    "pricing": {
+        "identity_mint": IDENTITY_MINT_PRICE,
+        "registration": "FREE (requires ERC-8004)",
+        "listing": LISTING_PRICE,
+    },
+    "rate_limits": {
+        "services_per_hour": SERVICES_PER_HOUR,
+        "services_per_day": SERVICES_PER_DAY,
+    },
+    "network": f"{NETWORK} ({'Base Sepolia' if USE_TESTNET else 'Base'})",
+    "token": "0xa6e3f88Ac4a9121B697F7bC9674C828d8d6D0B07",  # $MOLTMART token (mainnet only)
+}
+
+# Uptime checkers poll /health constantly - one RPC round trip per 5s is plenty
+HEALTH_CACHE_TTL_SECONDS = 5
+
+
+@ttl_cache(maxsize=1, ttl=HEALTH_CACHE_TTL_SECONDS)
+def erc8004_health_status() -> dict:
+    """check_8004_connection() (sync RPC) behind a short TTL cache"""
+    return check_8004_connection()
+
+
 @app.get("/")
-async def root():
-    return {
-        "name": "MoltMart API",
-        "version": "1.0.0",
-        "description": "The marketplace for AI agent services",
-        "x402_enabled": True,
-        "erc8004_required": True,
-        "pricing": {
-            "identity_mint": IDENTITY_MINT_PRICE,
-            "registration": "FREE (requires ERC-8004)",
-            "listing": LISTING_PRICE,
-        },
-        "rate_limits": {
-            "services_per_hour": SERVICES_PER_HOUR,
-            "services_per_day": SERVICES_PER_DAY,
-        },
-        "network": f"{NETWORK} ({'Base Sepolia' if USE_TESTNET else 'Base'})",
-        "token": "0xa6e3f88Ac4a9121B697F7bC9674C828d8d6D0B07",  # $MOLTMART token (mainnet only)
-    }
+async def root(response: Response):
+    response.headers["Cache-Control"] = f"public, max-age={HEALTH_CACHE_TTL_SECONDS}"
+    return ROOT_INFO
 
 
 @app.get("/health")
-async def health():
+async def health(response: Response):
+    response.headers["Cache-Control"] = f"private, max-age={HEALTH_CACHE_TTL_SECONDS}"
+
     # Check ERC-8004 connection
-    erc8004_status = check_8004_connection()
+    erc8004_status = await asyncio.to_thread(erc8004_health_status)
     
     chain_name = "Base Sepolia (84532)" if USE_TESTNET else "Base Mainnet (8453)"
     
@@ -681,10 +872,9 @@ async def debug_mint_test(mint_request: IdentityMintRequest):
     wallet = mint_request.wallet_address
     print(f"🧪 DEBUG mint test for {wallet}")
     
-    # Call the mint function directly
-    result = mint_8004_identity(
-        agent_uri=f"https://api.moltmart.app/debug/agent/{wallet}",
-        recipient_wallet=wallet
+    # Call the mint function directly (on the mint pool - it blocks for the whole mint + transfer)
+    result = await asyncio.get_running_loop().run_in_executor(
+        _mint_executor, mint_8004_identity, f"https://api.moltmart.app/debug/agent/{wallet}", wallet
     )
     
     if result.get("error"):
@@ -710,13 +900,35 @@ async def debug_mint_test(mint_request: IdentityMintRequest):
 
 # ============ ERC-8004 IDENTITY SERVICE (x402 PROTECTED) ============
 
+# ERC-8004 credential lookups hit the Base RPC (hundreds of ms). Positive
+# results are cached briefly per wallet; misses are not cached so a fresh
+# mint is picked up immediately.
+CREDS_CACHE_TTL_SECONDS = 60
+_creds_cache: TTLCache = TTLCache(maxsize=10_000, ttl=CREDS_CACHE_TTL_SECONDS)
+
+
+# Minting blocks on RPC + receipts for many seconds - keep it on its own
+# small pool so it can't starve the default executor used elsewhere.
+_mint_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="erc8004-mint")
+
+
+async def cached_8004_credentials(wallet_address: str) -> dict | None:
+    """get_8004_credentials_simple() behind a short per-wallet TTL cache"""
+    wallet = wallet_address.lower()
+    creds = _creds_cache.get(wallet)
+    if creds is None:
+        creds = await get_8004_credentials_simple(wallet)
+        if creds is not None:
+            _creds_cache[wallet] = creds
+    return creds
+
 
 async def _do_mint_identity(wallet: str, request: Request) -> IdentityMintResponse:
     """Internal function to mint ERC-8004 identity (used by both x402 and on-chain payment endpoints)"""
     
     # Check if already has ERC-8004
     try:
-        creds = await get_8004_credentials_simple(wallet)
+        creds = await cached_8004_credentials(wallet)
         if creds and creds.get("has_8004"):
             return IdentityMintResponse(
                 success=True,
@@ -729,18 +941,17 @@ async def _do_mint_identity(wallet: str, request: Request) -> IdentityMintRespon
         print(f"Warning: Error checking existing ERC-8004: {e}")
 
     # Build the agent URI
-    base_url = str(request.base_url).rstrip("/")
+    base_url = PUBLIC_BASE_URL or str(request.base_url).rstrip("/")
     agent_uri = f"{base_url}/identity/{wallet}/profile.json"
 
     # Mint the identity and transfer to user's wallet
-    import asyncio
-    from functools import partial
-
     try:
-        mint_fn = partial(mint_8004_identity, agent_uri, wallet)
-        mint_result = await asyncio.get_event_loop().run_in_executor(None, mint_fn)
+        mint_result = await asyncio.get_running_loop().run_in_executor(
+            _mint_executor, mint_8004_identity, agent_uri, wallet
+        )
 
         if mint_result.get("success"):
+            _creds_cache.pop(wallet, None)  # Next lookup sees the new token
             agent_8004_id = mint_result.get("agent_id")
             tx_hash = mint_result.get("tx_hash")
             transfer_tx = mint_result.get("transfer_tx_hash")
@@ -821,13 +1032,13 @@ class OnchainMintRequest(BaseModel):
 
     @validator("wallet_address")
     def validate_eth_address(cls, v):
-        if not re.match(r"^0x[a-fA-F0-9]{40}$", v):
+        if not _ETH_ADDR_RE.match(v):
             raise ValueError("Invalid Ethereum address format")
         return v.lower()
     
     @validator("tx_hash")
     def validate_tx_hash(cls, v):
-        if not re.match(r"^0x[a-fA-F0-9]{64}$", v):
+        if not _TX_HASH_RE.match(v):
             raise ValueError("Invalid transaction hash format")
         return v.lower()
 
@@ -884,6 +1095,48 @@ async def mint_identity(mint_request: IdentityMintRequest, request: Request):
 # ============ AGENT REGISTRATION (FREE - requires ERC-8004) ============
 
 
+def make_registration_challenge(ts: int | None = None) -> str:
+    """Build the registration challenge for the window containing ts (default: now)."""
+    if ts is None:
+        ts = int(time.time())
+    ts -= ts % REGISTRATION_CHALLENGE_WINDOW_SECONDS
+    tag = hmac.new(CHALLENGE_SECRET, f"reg:{ts}".encode(), hashlib.sha256).hexdigest()[:16]
+    return f"MoltMart Registration v2 ts={ts} tag={tag}"
+
+
+def registration_challenge_candidates(challenge: str | None) -> list[str]:
+    """
+    Challenges a registration signature may have been made over.
+
+    If the client echoes the challenge back, check its tag and age. Otherwise
+    the current and previous windows are the only ones still valid.
+    """
+    now = int(time.time())
+    if challenge is None:
+        return [
+            make_registration_challenge(now),
+            make_registration_challenge(now - REGISTRATION_CHALLENGE_WINDOW_SECONDS),
+        ]
+    match = _REGISTRATION_CHALLENGE_RE.match(challenge)
+    if not match:
+        return []
+    ts = int(match.group(1))
+    if not 0 <= now - ts < REGISTRATION_CHALLENGE_MAX_AGE_SECONDS:
+        return []
+    if not hmac.compare_digest(challenge, make_registration_challenge(ts)):
+        return []
+    return [challenge]
+
+
+async def verify_registration_signature(wallet_address: str, signature: str, challenge: str | None) -> bool:
+    """Verify a signature over a still-valid registration challenge."""
+    for message in registration_challenge_candidates(challenge):
+        # ECDSA recovery is CPU-bound - keep it off the event loop
+        if await asyncio.to_thread(verify_signature, wallet_address, signature, message):
+            return True
+    return False
+
+
 def verify_signature(wallet_address: str, signature: str, message: str) -> bool:
     """Verify that signature was created by the wallet owner."""
     try:
@@ -911,7 +1164,7 @@ async def verify_onchain_challenge(wallet_address: str, tx_hash: str) -> tuple[b
     
     # Check if expired
     if time.time() > challenge["expires_at"]:
-        del onchain_challenges[wallet]
+        onchain_challenges.pop(wallet, None)
         return False, "Challenge expired. Get a new one from GET /agents/challenge/onchain"
     
     expected_nonce = challenge["nonce"]
@@ -945,7 +1198,7 @@ async def verify_onchain_challenge(wallet_address: str, tx_hash: str) -> tuple[b
             return False, f"Transaction calldata doesn't match. Expected {expected_calldata}, got {tx_input}"
         
         # Success! Clean up the challenge
-        del onchain_challenges[wallet]
+        onchain_challenges.pop(wallet, None)
         print(f"✅ On-chain challenge verified for {wallet} via tx {tx_hash}")
         return True, ""
         
@@ -977,7 +1230,7 @@ async def verify_usdc_payment(wallet_address: str, tx_hash: str, expected_amount
     
     # Check if expired
     if time.time() > challenge["expires_at"]:
-        del payment_challenges[challenge_key]
+        payment_challenges.pop(challenge_key, None)
         return False, "Payment challenge expired. Get a new one."
     
     # Get recipient from challenge (can be MoltMart or seller for service calls)
@@ -1030,7 +1283,7 @@ async def verify_usdc_payment(wallet_address: str, tx_hash: str, expected_amount
             return False, f"No valid USDC transfer found. Expected transfer from {wallet} to {expected_recipient}"
         
         # Success! Clean up the challenge
-        del payment_challenges[challenge_key]
+        payment_challenges.pop(challenge_key, None)
         return True, ""
         
     except Exception as e:
@@ -1077,7 +1330,7 @@ async def get_payment_challenge(action: str, wallet_address: str, service_id: st
         if not service_id:
             raise HTTPException(status_code=400, detail="service_id required for action=call")
         # Get service to find price and seller wallet
-        service = await get_service(service_id)
+        service = await get_service_cached(service_id)
         if not service:
             raise HTTPException(status_code=404, detail="Service not found")
         amount = service.price_usdc
@@ -1150,17 +1403,13 @@ async def list_agents(request: Request, limit: int = 50, offset: int = 0):
     
     Returns public profiles (no API keys).
     """
-    import time
-    
     start = time.time()
-    db_agents = await get_agents(limit=limit, offset=offset)
-    t1 = time.time()
-    print(f"⏱️ get_agents(): {(t1-start)*1000:.0f}ms")
-    
-    total = await count_agents()
-    t2 = time.time()
-    print(f"⏱️ count_agents(): {(t2-t1)*1000:.0f}ms")
-    print(f"⏱️ TOTAL DB: {(t2-start)*1000:.0f}ms")
+    # Page + total on separate sessions, concurrently
+    db_agents, total = await asyncio.gather(
+        get_agents(limit=limit, offset=offset),
+        count_agents(),
+    )
+    print(f"⏱️ TOTAL DB: {(time.time()-start)*1000:.0f}ms")
     
     agents = [
         AgentPublicProfile(
@@ -1214,13 +1463,15 @@ async def get_registration_challenge():
     """
     Get the challenge message to sign for registration (off-chain method).
 
-    Sign this message with your wallet to prove ownership.
+    Sign this message with your wallet to prove ownership. Challenges are
+    time-bounded - sign and register within a few minutes.
     
     ⚠️ If your wallet can't sign messages (e.g., Bankr, custodial wallets),
     use GET /agents/challenge/onchain instead.
     """
     return {
-        "challenge": REGISTRATION_CHALLENGE,
+        "challenge": make_registration_challenge(),
+        "expires_in_seconds": REGISTRATION_CHALLENGE_MAX_AGE_SECONDS - REGISTRATION_CHALLENGE_WINDOW_SECONDS,
         "instructions": "Sign this message with your wallet, then POST to /agents/register with the signature.",
         "alternative": "If you can't sign messages, use GET /agents/challenge/onchain for on-chain verification.",
     }
@@ -1242,12 +1493,7 @@ async def get_onchain_challenge(wallet_address: str):
     The transaction proves you control the wallet.
     """
     wallet = wallet_address.lower()
-    
-    # Clean expired challenges
     now = time.time()
-    expired = [w for w, c in onchain_challenges.items() if c["expires_at"] < now]
-    for w in expired:
-        del onchain_challenges[w]
     
     # Generate unique nonce
     nonce = secrets.token_hex(16)
@@ -1302,10 +1548,10 @@ async def register_agent(agent_data: AgentRegister, request: Request):
     # 1. Verify wallet ownership (signature OR on-chain tx)
     if agent_data.signature:
         # Method A: Off-chain signature
-        if not verify_signature(wallet, agent_data.signature, REGISTRATION_CHALLENGE):
+        if not await verify_registration_signature(wallet, agent_data.signature, agent_data.challenge):
             raise HTTPException(
                 status_code=401,
-                detail="Invalid signature. Sign the challenge message from GET /agents/challenge with your wallet.",
+                detail="Invalid or expired signature. Sign a fresh challenge from GET /agents/challenge with your wallet.",
             )
     elif agent_data.tx_hash:
         # Method B: On-chain verification
@@ -1346,7 +1592,7 @@ async def register_agent(agent_data: AgentRegister, request: Request):
             print(f"✅ Verified ownership of ERC-8004 #{agent_8004_id}")
         else:
             # No ID provided - check if they have one (optional)
-            creds = await get_8004_credentials_simple(wallet)
+            creds = await cached_8004_credentials(wallet)
             if creds and creds.get("has_8004"):
                 agent_8004_id = creds.get("agent_id")
                 agent_8004_registry = creds.get("agent_registry")
@@ -1382,7 +1628,8 @@ async def register_agent(agent_data: AgentRegister, request: Request):
 
     db_agent = AgentDB(
         id=agent_id,
-        api_key=api_key,
+        api_key_prefix=api_key_prefix(api_key),
+        api_key_hash=hash_api_key(api_key),
         name=agent_data.name,
         wallet_address=wallet,
         description=agent_data.description,
@@ -1403,7 +1650,7 @@ async def register_agent(agent_data: AgentRegister, request: Request):
     print(f"✅ Agent {agent_data.name} registered {verified_status}")
 
     # Return pydantic model
-    return db_agent_to_pydantic(db_agent)
+    return db_agent_to_pydantic(db_agent, api_key)
 
 
 @app.get("/agents/me")
@@ -1415,6 +1662,7 @@ async def get_my_agent(agent: Agent = Depends(require_agent)):
 class RecoverKeyRequest(BaseModel):
     wallet_address: str
     signature: str | None = None
+    challenge: str | None = None  # Challenge that was signed (optional - defaults to the current one)
     tx_hash: str | None = None
 
 
@@ -1453,10 +1701,10 @@ async def recover_api_key(request: RecoverKeyRequest):
     # 2. Verify wallet ownership (signature OR on-chain tx)
     if request.signature:
         # Method A: Off-chain signature
-        if not verify_signature(wallet, request.signature, REGISTRATION_CHALLENGE):
+        if not await verify_registration_signature(wallet, request.signature, request.challenge):
             raise HTTPException(
                 status_code=401,
-                detail="Invalid signature. Sign the challenge message from GET /agents/challenge with your wallet.",
+                detail="Invalid or expired signature. Sign a fresh challenge from GET /agents/challenge with your wallet.",
             )
     elif request.tx_hash:
         # Method B: On-chain verification
@@ -1560,7 +1808,7 @@ async def get_agent_profile_json(agent_id: str, request: Request):
         raise HTTPException(status_code=404, detail="Agent not found")
 
     # Build ERC-8004 registration file
-    base_url = str(request.base_url).rstrip("/")
+    base_url = PUBLIC_BASE_URL or str(request.base_url).rstrip("/")
 
     profile = {
         "type": "erc8004-agent-registration-v1",
@@ -1588,7 +1836,7 @@ async def get_agent_profile_json(agent_id: str, request: Request):
     if db_agent.github_handle:
         profile["external_links"]["github"] = f"https://github.com/{db_agent.github_handle}"
 
-    return JSONResponse(content=profile, media_type="application/json")
+    return profile
 
 
 @app.get("/agents/8004/token/{agent_id}")
@@ -1629,10 +1877,9 @@ async def get_8004_onchain_profile(agent_id: int):
                 if token_uri.startswith("ipfs://"):
                     token_uri = token_uri.replace("ipfs://", "https://ipfs.io/ipfs/")
                 
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    resp = await client.get(token_uri)
-                    if resp.status_code == 200:
-                        result["metadata"] = resp.json()
+                resp = await http_client.get(token_uri, timeout=5.0)
+                if resp.status_code == 200:
+                    result["metadata"] = resp.json()
             except Exception as e:
                 result["metadata_error"] = str(e)
         
@@ -1674,7 +1921,7 @@ async def check_8004_credentials(wallet_address: str):
     
     # Not in our database - fall back to blockchain query
     try:
-        creds = await get_8004_credentials_simple(wallet_address)
+        creds = await cached_8004_credentials(wallet_address)
         if creds:
             return {
                 "wallet": wallet_address,
@@ -1786,14 +2033,10 @@ async def get_agent_reputation_by_wallet(wallet: str, tag: str = ""):
     
     # Get MoltMart review stats (from services this agent provides)
     try:
+        # Running totals are on the service rows - no per-service query
         services = await get_services(provider_wallet=wallet_lower)
-        total_reviews = 0
-        total_rating = 0
-        for svc in services:
-            summary = await get_service_rating_summary(svc.id)
-            if summary and summary.get("review_count", 0) > 0:
-                total_reviews += summary["review_count"]
-                total_rating += summary["average_rating"] * summary["review_count"]
+        total_reviews = sum(svc.rating_count or 0 for svc in services)
+        total_rating = sum(svc.rating_sum or 0 for svc in services)
         
         if total_reviews > 0:
             result["moltmart_reviews"] = {
@@ -1844,18 +2087,34 @@ class ServiceCreateOnchain(BaseModel):
     example_request: dict | None = None
     example_response: dict | None = None
     
+    @validator("input_schema", "output_schema", "example_request", "example_response")
+    def validate_json_fields(cls, v):
+        """Storefront JSON is stored via orjson - integers must fit in 64 bits"""
+        return _check_json_value(v)
+    
     @validator("tx_hash")
     def validate_tx_hash(cls, v):
-        if not re.match(r"^0x[a-fA-F0-9]{64}$", v):
+        if not _TX_HASH_RE.match(v):
             raise ValueError("Invalid transaction hash format")
         return v.lower()
 
 
+def hash_service_token(secret_token: str) -> str:
+    """
+    Hash a service secret token for storage.
+
+    Deliberately unkeyed SHA-256: the stored hash is also the HMAC key for
+    X-MoltMart-Signature and the X-MoltMart-Token value, so a seller must be
+    able to derive it from their token alone.
+    """
+    return hashlib.sha256(secret_token.encode()).hexdigest()
+
+
 async def _do_create_service(service_data: ServiceCreate, agent: Agent) -> ServiceCreateResponse:
     """Internal function to create service (used by both x402 and on-chain payment endpoints)"""
     
     # Check ERC-8004 identity (required to list services)
-    creds = await get_8004_credentials_simple(agent.wallet_address)
+    creds = await cached_8004_credentials(agent.wallet_address)
     if not creds or not creds.get("has_8004"):
         raise HTTPException(
             status_code=403,
@@ -1869,9 +2128,10 @@ async def _do_create_service(service_data: ServiceCreate, agent: Agent) -> Servi
 
     service_id = str(uuid.uuid4())
 
-    # Generate secret token for this service
-    secret_token = f"mm_tok_{secrets.token_urlsafe(32)}"
-    secret_token_hash = hashlib.sha256(secret_token.encode()).hexdigest()
+    # Generate secret token for this service from a single urandom read
+    raw_token = os.urandom(32)
+    secret_token = "mm_tok_" + base64.urlsafe_b64encode(raw_token).rstrip(b"=").decode()
+    secret_token_hash = hash_service_token(secret_token)
 
     # Create service in database
     db_service = ServiceDB(
@@ -1889,10 +2149,10 @@ async def _do_create_service(service_data: ServiceCreate, agent: Agent) -> Servi
         revenue_usdc=0.0,
         # Storefront fields (optional)
         usage_instructions=service_data.usage_instructions,
-        input_schema=json.dumps(service_data.input_schema) if service_data.input_schema else None,
-        output_schema=json.dumps(service_data.output_schema) if service_data.output_schema else None,
-        example_request=json.dumps(service_data.example_request) if service_data.example_request else None,
-        example_response=json.dumps(service_data.example_response) if service_data.example_response else None,
+        input_schema=orjson.dumps(service_data.input_schema).decode() if service_data.input_schema else None,
+        output_schema=orjson.dumps(service_data.output_schema).decode() if service_data.output_schema else None,
+        example_request=orjson.dumps(service_data.example_request).decode() if service_data.example_request else None,
+        example_response=orjson.dumps(service_data.example_response).decode() if service_data.example_response else None,
     )
     await create_service(db_service)
 
@@ -1998,22 +2258,21 @@ async def list_services(
     offset: int = 0,
 ):
     """List all services, optionally filtered by category or provider wallet (rate limited: 120/min)"""
-    db_services = await get_services(category=category, provider_wallet=provider_wallet, limit=limit, offset=offset)
-    all_db_services = await get_all_services()
-
-    # Filter for total count
-    filtered = all_db_services
-    if category:
-        filtered = [s for s in filtered if s.category.lower() == category.lower()]
-    if provider_wallet:
-        filtered = [s for s in filtered if s.provider_wallet.lower() == provider_wallet.lower()]
-    total = len(filtered)
-
-    return ServiceList(
-        services=[db_service_to_response(s) for s in db_services],
-        total=total,
-        limit=limit,
-        offset=offset,
+    # Page and total count are independent queries - run them concurrently
+    db_services, total = await asyncio.gather(
+        get_services(category=category, provider_wallet=provider_wallet, limit=limit, offset=offset),
+        count_services(category=category, provider_wallet=provider_wallet),
+    )
+
+    # Returned as a Response so FastAPI skips re-validating against ServiceList
+    # (response_model is kept for the OpenAPI schema)
+    return ORJSONResponse(
+        {
+            "services": [db_service_to_response(s).model_dump() for s in db_services],
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+        }
     )
 
 
@@ -2021,10 +2280,10 @@ async def list_services(
 @limiter.limit(RATE_LIMIT_READ)
 async def get_service_by_id(request: Request, service_id: str):
     """Get a specific service by ID (rate limited: 120/min)"""
-    db_service = await get_service(service_id)
+    db_service = await get_service_cached(service_id)
     if not db_service:
         raise HTTPException(status_code=404, detail="Service not found")
-    return db_service_to_response(db_service)
+    return ORJSONResponse(db_service_to_response(db_service).model_dump())
 
 
 class ServiceUpdate(BaseModel):
@@ -2041,6 +2300,15 @@ class ServiceUpdate(BaseModel):
     example_request: dict | None = None
     example_response: dict | None = None
 
+    @validator("input_schema", "output_schema", "example_request", "example_response")
+    def validate_json_fields(cls, v):
+        """Storefront JSON is stored via orjson - integers must fit in 64 bits"""
+        return _check_json_value(v)
+
+
+# Storefront fields stored as JSON text columns
+_JSON_FIELDS = frozenset({"input_schema", "output_schema", "example_request", "example_response"})
+
 
 @app.patch("/services/{service_id}", response_model=ServiceResponse)
 async def update_service(
@@ -2067,27 +2335,11 @@ async def update_service(
         raise HTTPException(status_code=403, detail="You can only update your own services")
     
     # Build update dict with only provided fields
-    update_data = {}
-    if update.name is not None:
-        update_data["name"] = update.name
-    if update.description is not None:
-        update_data["description"] = update.description
-    if update.endpoint_url is not None:
-        update_data["endpoint_url"] = str(update.endpoint_url)
-    if update.price_usdc is not None:
-        update_data["price_usdc"] = update.price_usdc
-    if update.category is not None:
-        update_data["category"] = update.category
-    if update.usage_instructions is not None:
-        update_data["usage_instructions"] = update.usage_instructions
-    if update.input_schema is not None:
-        update_data["input_schema"] = json.dumps(update.input_schema)
-    if update.output_schema is not None:
-        update_data["output_schema"] = json.dumps(update.output_schema)
-    if update.example_request is not None:
-        update_data["example_request"] = json.dumps(update.example_request)
-    if update.example_response is not None:
-        update_data["example_response"] = json.dumps(update.example_response)
+    raw = update.model_dump(exclude_unset=True, exclude_none=True)
+    update_data = {
+        k: str(v) if k == "endpoint_url" else orjson.dumps(v).decode() if k in _JSON_FIELDS else v
+        for k, v in raw.items()
+    }
     
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
@@ -2096,6 +2348,7 @@ async def update_service(
     updated = await update_service_db(service_id, update_data)
     if not updated:
         raise HTTPException(status_code=500, detail="Failed to update service")
+    service_cache.pop(service_id, None)
     
     print(f"✅ Service {service_id} updated by {agent.name}")
     return db_service_to_response(updated)
@@ -2128,6 +2381,8 @@ async def delete_service(
     deleted = await delete_service_db(service_id)
     if not deleted:
         raise HTTPException(status_code=500, detail="Failed to delete service")
+    service_cache.pop(service_id, None)
+    reviews_cache.pop(service_id, None)
     
     print(f"🗑️ Service {service_id} deleted by {agent.name}")
     return {"success": True, "message": f"Service '{db_service.name}' deleted"}
@@ -2137,14 +2392,8 @@ async def delete_service(
 @limiter.limit(RATE_LIMIT_SEARCH)
 async def search_services(request: Request, query: str, limit: int = 10):
     """Search services by name or description (rate limited: 30/min)"""
-    query_lower = query.lower()
-    all_db_services = await get_all_services()
-    results = [
-        db_service_to_response(s)
-        for s in all_db_services
-        if query_lower in s.name.lower() or query_lower in (s.description or "").lower()
-    ]
-    return {"results": results[:limit], "query": query}
+    db_services = await search_services_db(query, limit=limit)
+    return {"results": [db_service_to_response(s) for s in db_services], "query": query}
 
 
 # ============ CATEGORIES ============
@@ -2154,9 +2403,11 @@ async def search_services(request: Request, query: str, limit: int = 10):
 @limiter.limit(RATE_LIMIT_READ)
 async def list_categories(request: Request):
     """List all available categories (rate limited: 120/min)"""
-    all_db_services = await get_all_services()
-    categories = set(s.category for s in all_db_services)
-    return {"categories": list(categories)}
+    categories = categories_cache.get("all")
+    if categories is None:
+        categories = await get_distinct_categories()
+        categories_cache["all"] = categories
+    return {"categories": categories}
 
 
 # ============ FEEDBACK ============
@@ -2187,7 +2438,7 @@ async def submit_review(review: ReviewRequest, agent: Agent = Depends(require_ag
     for permanent, verifiable reputation.
     """
     # Get service
-    db_service = await get_service(review.service_id)
+    db_service = await get_service_cached(review.service_id)
     if not db_service:
         raise HTTPException(status_code=404, detail="Service not found")
 
@@ -2207,11 +2458,6 @@ async def submit_review(review: ReviewRequest, agent: Agent = Depends(require_ag
             detail="You must purchase this service before reviewing it. Only verified buyers can leave reviews."
         )
 
-    # Check for duplicate review
-    already_reviewed = await has_reviewed_service(agent.id, review.service_id)
-    if already_reviewed:
-        raise HTTPException(status_code=409, detail="You have already reviewed this service")
-
     # Create feedback record
     feedback_id = f"fb_{secrets.token_urlsafe(16)}"
     feedback_record = FeedbackDB(
@@ -2223,14 +2469,16 @@ async def submit_review(review: ReviewRequest, agent: Agent = Depends(require_ag
         comment=review.comment,
     )
 
-    # Save to database
-    await create_feedback(feedback_record)
+    # Save to database (unique index on service_id + agent_id rejects duplicates)
+    if await create_feedback(feedback_record) is None:
+        raise HTTPException(status_code=409, detail="You have already reviewed this service")
+    reviews_cache.pop(review.service_id, None)
 
     # Submit to ERC-8004 on-chain (if seller has ERC-8004 identity)
     onchain_result = None
     if db_service.provider_wallet:
         # Get seller's ERC-8004 agent_id
-        seller_8004 = await get_8004_credentials_simple(db_service.provider_wallet)
+        seller_8004 = await cached_8004_credentials(db_service.provider_wallet)
         if seller_8004 and seller_8004.get("agent_id"):
             # Convert 1-5 rating to positive/negative value
             # 4-5 stars = positive, 1-2 = negative, 3 = neutral
@@ -2264,27 +2512,31 @@ async def get_service_reviews(request: Request, service_id: str):
     Returns aggregate rating and list of verified reviews.
     All reviews are from verified purchasers only.
     """
-    db_service = await get_service(service_id)
+    cached = reviews_cache.get(service_id)
+    if cached is not None:
+        return cached
+
+    db_service = await get_service_cached(service_id)
     if not db_service:
         raise HTTPException(status_code=404, detail="Service not found")
 
-    # Get reviews from database
-    reviews = await get_feedback_for_service(service_id)
-    
-    # Get aggregate stats
-    stats = await get_service_rating_summary(service_id)
+    # Newest reviews + aggregate stats from the database, concurrently
+    reviews, stats = await asyncio.gather(
+        get_feedback_for_service(service_id, limit=20),
+        get_service_rating_summary(service_id),
+    )
 
     # Also try to get ERC-8004 on-chain reputation if seller has it
     onchain_reputation = None
     if db_service.provider_wallet:
-        seller_8004 = await get_8004_credentials_simple(db_service.provider_wallet)
+        seller_8004 = await cached_8004_credentials(db_service.provider_wallet)
         if seller_8004 and seller_8004.get("agent_id"):
             try:
                 onchain_reputation = get_reputation(seller_8004["agent_id"], tag="service")
             except Exception:
                 pass
 
-    return {
+    result = {
         "service_id": service_id,
         "average_rating": stats["average_rating"],
         "review_count": stats["review_count"],
@@ -2297,10 +2549,12 @@ async def get_service_reviews(request: Request, service_id: str):
                 "reviewer": r.agent_name,
                 "created_at": r.created_at.isoformat() if r.created_at else None,
             }
-            for r in reviews[:20]  # Limit to 20 most recent
+            for r in reviews  # 20 most recent
         ],
         "onchain_reputation": onchain_reputation,
     }
+    reviews_cache[service_id] = result
+    return result
 
 
 # ============ STATS ============
@@ -2309,27 +2563,244 @@ async def get_service_reviews(request: Request, service_id: str):
 @app.get("/stats")
 @limiter.limit(RATE_LIMIT_READ)
 async def get_stats(request: Request):
-    """Marketplace statistics (rate limited: 120/min)"""
-    all_db_services = await get_all_services()
-    total_agents = await count_agents()
+    """Marketplace statistics (rate limited: 120/min, cached for 30s)"""
+    cached = stats_cache.get("stats")
+    if cached is not None:
+        return cached
+
+    stats = await get_marketplace_stats()
+    stats_cache["stats"] = stats
+    return stats
+
+
+# ============ PROXY ENDPOINT ============
+
+
+@lru_cache(maxsize=1024)
+def _hmac_state(service_id: str, secret_token_hash: str) -> hmac.HMAC:
+    """
+    Keyed HMAC-SHA256 state for a service (cached - the stored token hash never changes).
+    Signing copies it, skipping the per-call key padding / ipad+opad setup.
+    """
+    return hmac.new(secret_token_hash.encode(), digestmod=hashlib.sha256)
 
+
+@lru_cache(maxsize=4096)
+def _service_static(service_id: str, price_usdc: float, token_hash: str) -> dict:
+    """
+    Per-service values the proxy would otherwise recompute on every call.
+    Keyed on the fields they derive from, so an update gets a fresh entry.
+    """
     return {
-        "total_services": len(all_db_services),
-        "total_agents": total_agents,
-        "total_providers": len(set(s.provider_name for s in all_db_services)),
-        "categories": len(set(s.category for s in all_db_services)),
-        "total_calls": sum(s.calls_count or 0 for s in all_db_services),
-        "total_revenue_usdc": sum(s.revenue_usdc or 0 for s in all_db_services),
+        "amount": str(int(price_usdc * 1_000_000)),  # USDC has 6 decimals
+        # Static part of the headers forwarded to the seller - copied, never mutated
+        "forward_headers": {
+            "Content-Type": "application/json",
+            "X-MoltMart-Token": token_hash[:32],  # Partial token for basic auth
+            "X-MoltMart-Signature-Alg": "hmac-sha256",
+            "X-MoltMart-Service": service_id,
+        },
     }
 
 
-# ============ PROXY ENDPOINT ============
+# Tx ids only need to be unique, not unguessable (nothing is looked up by them),
+# so a per-process prefix + counter replaces a CSPRNG read per call. The prefix
+# (random per process + start time) keeps ids distinct across workers, containers
+# and replicas, where pids and start seconds routinely collide.
+_TX_ID_PREFIX = f"mm_tx_{secrets.token_hex(4)}{int(time.time()):x}_"
+_tx_counter = itertools.count(1)
 
 
-def generate_hmac_signature(body: str, timestamp: int, service_id: str, secret_token: str) -> str:
-    """Generate HMAC-SHA256 signature for request verification"""
-    message = f"{body}|{timestamp}|{service_id}"
-    return hmac.new(secret_token.encode(), message.encode(), hashlib.sha256).hexdigest()
+def new_tx_id() -> str:
+    """Unique transaction id for a proxied call"""
+    return f"{_TX_ID_PREFIX}{next(_tx_counter)}"
+
+
+def _payment_requirements(amount: str, pay_to: str, resource_url: str) -> dict:
+    """x402 payment requirements for a service call - sent to the facilitator as-is"""
+    return {
+        "scheme": "exact",
+        "network": NETWORK,
+        "maxAmountRequired": amount,
+        "resource": resource_url,
+        "payTo": pay_to,
+        "maxTimeoutSeconds": 300,
+        "asset": USDC_CONTRACT,
+    }
+
+
+_RESOURCE_PLACEHOLDER = b"{RESOURCE}"
+
+
+def _build_402(service_id: str, name: str, price_usdc: float, pay_to: str, resource_url: str) -> bytes:
+    """Serialized 402 Payment Required body for a service call"""
+    template = _402_template(service_id, name, price_usdc, pay_to)
+    # JSON-escape the URL (orjson string literal minus its quotes) before splicing it in
+    return template.replace(_RESOURCE_PLACEHOLDER, orjson.dumps(resource_url)[1:-1], 1)
+
+
+@lru_cache(maxsize=4096)
+def _402_template(service_id: str, name: str, price_usdc: float, pay_to: str) -> bytes:
+    """
+    402 body for a service with a {RESOURCE} placeholder for the request URL.
+
+    Fully determined by its arguments, so a service update (new name, price or
+    wallet) naturally lands on a fresh cache entry. Keeping the URL out of the
+    key means query-string variations don't churn the cache.
+    """
+    amount = str(int(price_usdc * 1_000_000))  # USDC has 6 decimals
+    return orjson.dumps(
+        {
+            "error": "Payment Required",
+            "x402Version": 1,
+            "accepts": [
+                {
+                    **_payment_requirements(amount, pay_to, _RESOURCE_PLACEHOLDER.decode()),
+                    # Presentation-only fields for the client
+                    "description": f"Payment for service: {name}",
+                    "mimeType": "application/json",
+                    "extra": {
+                        "name": "USD Coin",
+                        "decimals": 6,
+                    },
+                }
+            ],
+        }
+    )
+
+
+def generate_hmac_signature(body: bytes, timestamp: int, service_id: str, state: hmac.HMAC) -> str:
+    """Generate HMAC-SHA256 signature over the raw request body bytes, from a keyed state"""
+    mac = state.copy()
+    mac.update(b"%b|%d|%b" % (body, timestamp, service_id.encode()))
+    return mac.hexdigest()
+
+
+async def post_to_seller(url: str, body: bytes, headers: dict) -> httpx.Response:
+    """POST to a seller endpoint, returning once headers arrive (body not read yet)"""
+    return await http_client.send(http_client.build_request("POST", url, content=body, headers=headers), stream=True)
+
+
+async def settlement_error(settle_task: asyncio.Task) -> ORJSONResponse | None:
+    """Await a facilitator /settle call; return the 402 to send if it failed, else None"""
+    try:
+        settle_response = await settle_task
+    except Exception as e:
+        return ORJSONResponse(status_code=402, content={"error": "Payment processing error", "detail": str(e)})
+    if settle_response.status_code != 200:
+        return ORJSONResponse(
+            status_code=402,
+            content={"error": "Payment settlement error", "detail": settle_response.text},
+        )
+    settle_result = settle_response.json()
+    if not settle_result.get("success"):
+        return ORJSONResponse(
+            status_code=402,
+            content={"error": "Payment settlement failed", "reason": settle_result.get("errorReason", "Unknown")},
+        )
+    return None
+
+
+# Whether FACILITATOR_URL serves the combined /verify-and-settle route. None until
+# the first paid call probes it; older deploys and stock x402 facilitators only have
+# /verify and /settle, so a 404/405 switches this process to the sequential calls.
+_facilitator_combined: bool | None = None
+
+
+async def verify_and_settle(facilitator_request: dict) -> ORJSONResponse | None:
+    """Verify then settle an x402 payment; return the 402 to send if it failed, else None"""
+    global _facilitator_combined
+    if _facilitator_combined is not False:
+        facilitator_response = await http_client.post(
+            f"{FACILITATOR_URL}/verify-and-settle", json=facilitator_request
+        )
+        if facilitator_response.status_code in (404, 405):
+            _facilitator_combined = False
+            print("⚠️ Facilitator has no /verify-and-settle - falling back to /verify + /settle")
+        else:
+            _facilitator_combined = True
+            if facilitator_response.status_code != 200:
+                return ORJSONResponse(
+                    status_code=402,
+                    content={"error": "Payment verification failed", "detail": facilitator_response.text},
+                )
+            facilitator_result = facilitator_response.json()
+            verify_result = facilitator_result.get("verify", {})
+            if not verify_result.get("isValid", False):
+                return ORJSONResponse(
+                    status_code=402,
+                    content={"error": "Payment invalid", "reason": verify_result.get("invalidReason", "Unknown")},
+                )
+            settle_result = facilitator_result.get("settle", {})
+            if not settle_result.get("success"):
+                return ORJSONResponse(
+                    status_code=402,
+                    content={"error": "Payment settlement failed", "reason": settle_result.get("errorReason", "Unknown")},
+                )
+            return None
+
+    # Sequential fallback: verify, then settle if valid
+    verify_response = await http_client.post(f"{FACILITATOR_URL}/verify", json=facilitator_request)
+    if verify_response.status_code != 200:
+        return ORJSONResponse(
+            status_code=402,
+            content={"error": "Payment verification failed", "detail": verify_response.text},
+        )
+    verify_result = verify_response.json()
+    if not verify_result.get("isValid", False):
+        return ORJSONResponse(
+            status_code=402,
+            content={"error": "Payment invalid", "reason": verify_result.get("invalidReason", "Unknown")},
+        )
+    return await settlement_error(
+        asyncio.create_task(http_client.post(f"{FACILITATOR_URL}/settle", json=facilitator_request))
+    )
+
+
+async def discard_seller_call(seller_call: asyncio.Task) -> None:
+    """Cancel an in-flight seller call, closing its response if it already arrived"""
+    seller_call.cancel()
+    try:
+        response = await seller_call
+    except (asyncio.CancelledError, Exception):
+        return
+    await response.aclose()
+
+
+async def relay_seller_body(
+    response: httpx.Response,
+    tx_record: TransactionDB,
+    service_id: str,
+    price_usdc: float,
+):
+    """
+    Yield the seller's body to the buyer as it arrives, then record the call.
+
+    Payment has settled and the seller has answered by the time headers arrive, so
+    status and revenue follow the seller's status code. A stream that breaks
+    afterwards (seller timeout, buyer disconnect) is only noted in the tx error.
+    """
+    tx_record.status = "completed" if response.status_code == 200 else "failed"
+    tx_record.seller_response_code = response.status_code
+    try:
+        async for chunk in response.aiter_bytes():
+            yield chunk
+    except httpx.TimeoutException:
+        tx_record.error = "Seller response stream timed out"
+        raise
+    except httpx.RequestError as e:
+        tx_record.error = f"Seller response stream failed: {e}"
+        raise
+    except BaseException:
+        tx_record.error = "Response stream to buyer aborted"
+        raise
+    finally:
+        await response.aclose()
+        # Queue transaction log (written in the background)
+        queue_transaction(tx_record)
+        revenue = price_usdc if tx_record.status == "completed" else 0
+        # Shielded so a buyer disconnect can't cancel the stats update halfway
+        await asyncio.shield(update_service_stats(service_id, calls_delta=1, revenue_delta=revenue))
 
 
 @app.post("/services/{service_id}/call")
@@ -2351,14 +2822,16 @@ async def call_service(service_id: str, request: Request, agent: Agent = Depends
     Headers sent to seller:
     - X-MoltMart-Token: Secret token for basic auth
     - X-MoltMart-Signature: HMAC-SHA256(body|timestamp|service_id, secret_token)
+    - X-MoltMart-Signature-Alg: Signature algorithm (hmac-sha256)
     - X-MoltMart-Timestamp: Unix timestamp (verify within 60s)
     - X-MoltMart-Buyer: Buyer's wallet address
     - X-MoltMart-Tx: Transaction ID for audit
     """
-    # Get service from database
-    service = await get_service(service_id)
+    # Get service (short TTL cache - repeat calls and payment retries skip the DB)
+    service = await get_service_cached(service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
+    static = _service_static(service_id, service.price_usdc, service.secret_token_hash)
 
     # Check if service has an endpoint
     if not service.endpoint_url:
@@ -2373,31 +2846,11 @@ async def call_service(service_id: str, request: Request, agent: Agent = Depends
     payment_header = request.headers.get("X-Payment")
 
     if not payment_header:
-        # No payment - return 402 with requirements
-        # Build the 402 response manually
-        return JSONResponse(
+        # No payment - return 402 with requirements (prebuilt bytes, cached per service)
+        return Response(
+            content=_build_402(service_id, service.name, service.price_usdc, service.provider_wallet, resource_url),
             status_code=402,
-            content={
-                "error": "Payment Required",
-                "x402Version": 1,
-                "accepts": [
-                    {
-                        "scheme": "exact",
-                        "network": NETWORK,
-                        "maxAmountRequired": str(int(service.price_usdc * 1_000_000)),  # USDC has 6 decimals
-                        "resource": resource_url,
-                        "description": f"Payment for service: {service.name}",
-                        "mimeType": "application/json",
-                        "payTo": service.provider_wallet,
-                        "maxTimeoutSeconds": 300,
-                        "asset": USDC_CONTRACT,
-                        "extra": {
-                            "name": "USD Coin",
-                            "decimals": 6,
-                        },
-                    }
-                ],
-            },
+            media_type="application/json",
             headers={
                 "X-Payment-Required": "true",
             },
@@ -2406,81 +2859,34 @@ async def call_service(service_id: str, request: Request, agent: Agent = Depends
     # Payment header exists - verify it via facilitator
     try:
         # Decode the payment payload from base64
-        payment_payload_json = base64.b64decode(payment_header).decode("utf-8")
-        payment_payload = json.loads(payment_payload_json)
-
-        # Build requirements for verification
-        payment_requirements = {
-            "scheme": "exact",
-            "network": NETWORK,
-            "maxAmountRequired": str(int(service.price_usdc * 1_000_000)),
-            "resource": resource_url,
-            "payTo": service.provider_wallet,
-            "maxTimeoutSeconds": 300,
-            "asset": USDC_CONTRACT,
-        }
+        payment_payload = orjson.loads(base64.b64decode(payment_header))
 
-        # Verify and settle via facilitator
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Step 1: Verify payment
-            verify_response = await client.post(
-                f"{FACILITATOR_URL}/verify",
-                json={
-                    "paymentPayload": payment_payload,
-                    "paymentRequirements": payment_requirements,
-                },
-            )
+        # Build requirements for verification (same core as the 402 body)
+        payment_requirements = _payment_requirements(static["amount"], service.provider_wallet, resource_url)
 
-            if verify_response.status_code != 200:
-                return JSONResponse(
-                    status_code=402,
-                    content={
-                        "error": "Payment verification failed",
-                        "detail": verify_response.text,
-                    },
-                )
-
-            verify_result = verify_response.json()
-            if not verify_result.get("isValid", False):
-                return JSONResponse(
-                    status_code=402,
-                    content={
-                        "error": "Payment invalid",
-                        "reason": verify_result.get("invalidReason", "Unknown"),
-                    },
-                )
-
-            # Step 2: Settle payment (submit to blockchain)
-            settle_response = await client.post(
-                f"{FACILITATOR_URL}/settle",
-                json={
-                    "paymentPayload": payment_payload,
-                    "paymentRequirements": payment_requirements,
-                },
-            )
-
-            if settle_response.status_code == 200:
-                settle_result = settle_response.json()
-                if not settle_result.get("success"):
-                    return JSONResponse(
-                        status_code=402,
-                        content={
-                            "error": "Payment settlement failed",
-                            "reason": settle_result.get("errorReason", "Unknown"),
-                        },
-                    )
-                # Payment settled on-chain! Continue with request
-            else:
-                return JSONResponse(
-                    status_code=402,
-                    content={
-                        "error": "Payment settlement error",
-                        "detail": settle_response.text,
-                    },
-                )
+        facilitator_request = {
+            "paymentPayload": payment_payload,
+            "paymentRequirements": payment_requirements,
+        }
+        payer = payment_payload.get("payload", {}).get("authorization", {}).get("from", "").lower()
+        verify_key = (agent.id, payer, service_id)
+
+        settle_task = None
+        if payer and verify_key in verify_cache:
+            # This agent's payer verified for this service recently - settle only, overlapped with
+            # the seller call below (settlement still validates the authorization on-chain)
+            settle_task = asyncio.create_task(http_client.post(f"{FACILITATOR_URL}/settle", json=facilitator_request))
+        else:
+            # Verify, then settle if valid - one facilitator round trip where supported
+            payment_error = await verify_and_settle(facilitator_request)
+            if payment_error is not None:
+                return payment_error
+            if payer:
+                verify_cache[verify_key] = True
+            # Payment settled on-chain! Continue with request
 
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=402,
             content={
                 "error": "Payment processing error",
@@ -2490,36 +2896,34 @@ async def call_service(service_id: str, request: Request, agent: Agent = Depends
 
     # ============ PAYMENT VERIFIED - PROCEED WITH REQUEST ============
 
-    # Get request body
+    # Get request body (signed and forwarded as raw bytes)
     try:
         body = await request.body()
-        body_str = body.decode("utf-8") if body else ""
     except Exception:
-        body_str = ""
+        body = b""
 
     # Generate transaction ID
-    tx_id = f"mm_tx_{secrets.token_urlsafe(16)}"
-    timestamp = int(time.time())
+    tx_id = new_tx_id()
+    now = time.time()  # Single clock read for the signature timestamp and the tx record
+    timestamp = int(now)
 
     # Generate HMAC signature
     # The seller can verify this to ensure the request came from MoltMart
     signature = generate_hmac_signature(
-        body_str,
+        body,
         timestamp,
         service_id,
-        service.secret_token_hash,  # Using the stored hash as the shared secret
+        _hmac_state(service_id, service.secret_token_hash),  # Using the stored hash as the shared secret
     )
 
     # Prepare headers for seller
     headers = {
-        "Content-Type": "application/json",
-        "X-MoltMart-Token": service.secret_token_hash[:32],  # Partial token for basic auth
+        **static["forward_headers"],
         "X-MoltMart-Signature": signature,
         "X-MoltMart-Timestamp": str(timestamp),
         "X-MoltMart-Buyer": agent.wallet_address,
         "X-MoltMart-Buyer-Name": agent.name,
         "X-MoltMart-Tx": tx_id,
-        "X-MoltMart-Service": service_id,
     }
 
     # Create transaction record for database
@@ -2532,45 +2936,46 @@ async def call_service(service_id: str, request: Request, agent: Agent = Depends
         seller_wallet=service.provider_wallet.lower(),
         price_usdc=service.price_usdc,
         status="pending",
+        created_at=datetime.utcfromtimestamp(now),  # Stamped now - the row is written later by the background writer
     )
 
     # Forward request to seller's endpoint
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                str(service.endpoint_url),
-                content=body,
-                headers=headers,
-            )
-
-        # Update transaction status
-        tx_record.status = "completed" if response.status_code == 200 else "failed"
-        tx_record.seller_response_code = response.status_code
-
-        # Update service stats in database
-        if response.status_code == 200:
-            await update_service_stats(service_id, calls_delta=1, revenue_delta=service.price_usdc)
+        if settle_task is None:
+            response = await post_to_seller(str(service.endpoint_url), body, headers)
         else:
-            await update_service_stats(service_id, calls_delta=1, revenue_delta=0)
-
-        # Log transaction to database
-        await log_transaction(tx_record)
-
-        # Return seller's response to buyer
-        return Response(
-            content=response.content,
-            status_code=response.status_code,
-            headers={
-                "X-MoltMart-Tx": tx_id,
-                "X-MoltMart-Price": str(service.price_usdc),
-                "X-MoltMart-Seller": service.provider_wallet,
-            },
-            media_type=response.headers.get("content-type", "application/json"),
-        )
+            # Settlement and the seller call run concurrently - the buyer waits for the slower
+            seller_call = asyncio.create_task(post_to_seller(str(service.endpoint_url), body, headers))
+            payment_error = await settlement_error(settle_task)
+            if payment_error is not None:
+                verify_cache.pop(verify_key, None)
+                await discard_seller_call(seller_call)
+                tx_record.status = "failed"
+                tx_record.error = "Payment settlement failed - seller response discarded"
+                queue_transaction(tx_record)
+                return payment_error
+            response = await seller_call
+
+        # Return seller's response to buyer - the transaction and service stats are
+        # recorded by relay_seller_body once the body has been relayed
+        try:
+            return StreamingResponse(
+                relay_seller_body(response, tx_record, service_id, service.price_usdc),
+                status_code=response.status_code,
+                headers={
+                    "X-MoltMart-Tx": tx_id,
+                    "X-MoltMart-Price": str(service.price_usdc),
+                    "X-MoltMart-Seller": service.provider_wallet,
+                },
+                media_type=response.headers.get("content-type", "application/json"),
+            )
+        except BaseException:
+            await response.aclose()
+            raise
 
     except httpx.TimeoutException as e:
         tx_record.status = "timeout"
-        await log_transaction(tx_record)
+        queue_transaction(tx_record)
         raise HTTPException(
             status_code=504,
             detail={
@@ -2582,7 +2987,7 @@ async def call_service(service_id: str, request: Request, agent: Agent = Depends
     except httpx.RequestError as e:
         tx_record.status = "error"
         tx_record.error = str(e)
-        await log_transaction(tx_record)
+        queue_transaction(tx_record)
         raise HTTPException(
             status_code=502,
             detail={
@@ -2601,9 +3006,14 @@ class ServiceCallOnchainRequest(BaseModel):
     
     @validator("tx_hash")
     def validate_tx_hash(cls, v):
-        if not re.match(r"^0x[a-fA-F0-9]{64}$", v):
+        if not _TX_HASH_RE.match(v):
             raise ValueError("Invalid transaction hash format")
         return v.lower()
+    
+    @validator("request_data")
+    def validate_request_data(cls, v):
+        """Forwarded via orjson - rejected here, before payment is verified"""
+        return _check_json_value(v)
 
 
 @app.post("/services/{service_id}/call/onchain")
@@ -2624,10 +3034,11 @@ async def call_service_onchain(
     
     The payment goes directly to the seller - MoltMart just verifies it happened.
     """
-    # Get service
-    service = await get_service(service_id)
+    # Get service (short TTL cache)
+    service = await get_service_cached(service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
+    static = _service_static(service_id, service.price_usdc, service.secret_token_hash)
     
     if not service.endpoint_url:
         raise HTTPException(status_code=400, detail="This service does not have a callable endpoint")
@@ -2647,30 +3058,29 @@ async def call_service_onchain(
     
     # ============ PAYMENT VERIFIED - FORWARD TO SELLER ============
     
-    body_str = json.dumps(call_request.request_data) if call_request.request_data else ""
+    body = orjson.dumps(call_request.request_data) if call_request.request_data else b""
     
     # Generate transaction ID
-    tx_id = f"mm_tx_{secrets.token_urlsafe(16)}"
-    timestamp = int(time.time())
+    tx_id = new_tx_id()
+    now = time.time()  # Single clock read for the signature timestamp and the tx record
+    timestamp = int(now)
     
     # Generate HMAC signature
     signature = generate_hmac_signature(
-        body_str,
+        body,
         timestamp,
         service_id,
-        service.secret_token_hash,
+        _hmac_state(service_id, service.secret_token_hash),
     )
     
     # Prepare headers for seller
     headers = {
-        "Content-Type": "application/json",
-        "X-MoltMart-Token": service.secret_token_hash[:32],
+        **static["forward_headers"],
         "X-MoltMart-Signature": signature,
         "X-MoltMart-Timestamp": str(timestamp),
         "X-MoltMart-Buyer": agent.wallet_address,
         "X-MoltMart-Buyer-Name": agent.name,
         "X-MoltMart-Tx": tx_id,
-        "X-MoltMart-Service": service_id,
         "X-MoltMart-Payment-Method": "onchain",  # Indicate this was an on-chain payment
     }
     
@@ -2684,49 +3094,37 @@ async def call_service_onchain(
         seller_wallet=service.provider_wallet.lower(),
         price_usdc=service.price_usdc,
         status="pending",
+        created_at=datetime.utcfromtimestamp(now),  # Stamped now - the row is written later by the background writer
     )
     
     # Forward request to seller's endpoint
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                str(service.endpoint_url),
-                content=body_str.encode() if body_str else b"",
-                headers=headers,
-            )
-        
-        # Update transaction status
-        tx_record.status = "completed" if response.status_code == 200 else "failed"
-        tx_record.seller_response_code = response.status_code
-        
-        # Update service stats
-        if response.status_code == 200:
-            await update_service_stats(service_id, calls_delta=1, revenue_delta=service.price_usdc)
-        else:
-            await update_service_stats(service_id, calls_delta=1, revenue_delta=0)
-        
-        # Log to database
-        await log_transaction(tx_record)
+        response = await post_to_seller(str(service.endpoint_url), body, headers)
         
-        return Response(
-            content=response.content,
-            status_code=response.status_code,
-            headers={
-                "X-MoltMart-Tx": tx_id,
-                "X-MoltMart-Price": str(service.price_usdc),
-                "X-MoltMart-Seller": service.provider_wallet,
-            },
-            media_type=response.headers.get("content-type", "application/json"),
-        )
+        # Transaction and service stats are recorded by relay_seller_body once streamed
+        try:
+            return StreamingResponse(
+                relay_seller_body(response, tx_record, service_id, service.price_usdc),
+                status_code=response.status_code,
+                headers={
+                    "X-MoltMart-Tx": tx_id,
+                    "X-MoltMart-Price": str(service.price_usdc),
+                    "X-MoltMart-Seller": service.provider_wallet,
+                },
+                media_type=response.headers.get("content-type", "application/json"),
+            )
+        except BaseException:
+            await response.aclose()
+            raise
     
     except httpx.TimeoutException as e:
         tx_record.status = "timeout"
-        await log_transaction(tx_record)
+        queue_transaction(tx_record)
         raise HTTPException(status_code=504, detail={"error": "Seller endpoint timed out", "tx_id": tx_id}) from e
     except httpx.RequestError as e:
         tx_record.status = "error"
         tx_record.error = str(e)
-        await log_transaction(tx_record)
+        queue_transaction(tx_record)
         raise HTTPException(status_code=502, detail={"error": "Failed to reach seller endpoint", "tx_id": tx_id}) from e
 
 
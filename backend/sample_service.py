@@ -4,9 +4,11 @@ A simple price oracle that returns crypto prices
 """
 
 import base64
-import json
+from datetime import UTC, datetime
 
 import httpx
+import orjson
+from cachetools import TTLCache
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -28,6 +30,51 @@ PRICE_PER_REQUEST = 0.001  # $0.001 USDC per request
 RECIPIENT_WALLET = "0xf25896f67f849091f6d5bfed7736859aa42427b4"  # Kyro's wallet
 NETWORK = "base"
 
+COINGECKO_PRICE_URL = "https://api.coingecko.com/api/v3/simple/price"
+COINGECKO_IDS = {
+    "btc": "bitcoin",
+    "eth": "ethereum",
+    "usdc": "usd-coin",
+    "sol": "solana",
+    "base": "base",
+    "matic": "matic-network",
+    "arb": "arbitrum",
+    "op": "optimism",
+}
+
+# Reused across requests so CoinGecko calls keep their connection alive
+http_client = httpx.AsyncClient(timeout=10.0)
+
+# Prices barely move second to second - serve hot symbols from memory for 10s
+PRICE_CACHE_TTL_SECONDS = 10
+price_cache: TTLCache = TTLCache(maxsize=256, ttl=PRICE_CACHE_TTL_SECONDS)
+
+
+def utc_now_iso() -> str:
+    """Current UTC time as ISO-8601 with a Z suffix"""
+    return datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+async def fetch_prices(cg_ids: tuple[str, ...], include_24hr_change: bool = False) -> dict:
+    """CoinGecko simple/price lookup, cached per (sorted ids, change flag)"""
+    key = (tuple(sorted(cg_ids)), include_24hr_change)
+    data = price_cache.get(key)
+    if data is None:
+        params = {"ids": ",".join(key[0]), "vs_currencies": "usd"}
+        if include_24hr_change:
+            params["include_24hr_change"] = "true"
+        resp = await http_client.get(COINGECKO_PRICE_URL, params=params)
+        data = orjson.loads(resp.content)
+        # Don't pin a rate-limit or error body for the whole TTL
+        if resp.status_code == 200:
+            price_cache[key] = data
+    return data
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await http_client.aclose()
+
 
 def create_payment_required_header():
     """Create x402 PAYMENT-REQUIRED header"""
@@ -38,7 +85,7 @@ def create_payment_required_header():
         "recipient": RECIPIENT_WALLET,
         "description": "Price oracle query",
     }
-    return base64.b64encode(json.dumps(payment_details).encode()).decode()
+    return base64.b64encode(orjson.dumps(payment_details)).decode()
 
 
 @app.get("/")
@@ -69,7 +116,7 @@ async def get_price(symbol: str, request: Request):
     if not payment_signature:
         # Return 402 Payment Required
         return Response(
-            content=json.dumps(
+            content=orjson.dumps(
                 {
                     "error": "Payment Required",
                     "message": f"This endpoint requires payment of ${PRICE_PER_REQUEST} USDC via x402",
@@ -88,39 +135,24 @@ async def get_price(symbol: str, request: Request):
 
     # Fetch real price from CoinGecko (free API)
     symbol_lower = symbol.lower()
-    coingecko_ids = {
-        "btc": "bitcoin",
-        "eth": "ethereum",
-        "usdc": "usd-coin",
-        "sol": "solana",
-        "base": "base",
-        "matic": "matic-network",
-        "arb": "arbitrum",
-        "op": "optimism",
-    }
-
-    cg_id = coingecko_ids.get(symbol_lower, symbol_lower)
+    cg_id = COINGECKO_IDS.get(symbol_lower, symbol_lower)
 
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"https://api.coingecko.com/api/v3/simple/price?ids={cg_id}&vs_currencies=usd&include_24hr_change=true"
-            )
-            data = resp.json()
+        data = await fetch_prices((cg_id,), include_24hr_change=True)
 
-            if cg_id in data:
-                price_data = data[cg_id]
-                return {
-                    "symbol": symbol.upper(),
-                    "price_usd": price_data.get("usd"),
-                    "change_24h": price_data.get("usd_24h_change"),
-                    "timestamp": "2026-02-03T03:58:00Z",
-                    "source": "coingecko",
-                    "paid": True,
-                    "cost_usdc": PRICE_PER_REQUEST,
-                }
-            else:
-                return {"error": f"Unknown symbol: {symbol}", "paid": True}
+        if cg_id in data:
+            price_data = data[cg_id]
+            return {
+                "symbol": symbol.upper(),
+                "price_usd": price_data.get("usd"),
+                "change_24h": price_data.get("usd_24h_change"),
+                "timestamp": utc_now_iso(),
+                "source": "coingecko",
+                "paid": True,
+                "cost_usdc": PRICE_PER_REQUEST,
+            }
+        else:
+            return {"error": f"Unknown symbol: {symbol}", "paid": True}
 
     except Exception as e:
         return {"error": str(e), "paid": True}
@@ -137,7 +169,7 @@ async def get_prices(request: Request, symbols: str = "btc,eth,sol"):
 
     if not payment_signature:
         return Response(
-            content=json.dumps(
+            content=orjson.dumps(
                 {
                     "error": "Payment Required",
                     "message": f"This endpoint requires payment of ${PRICE_PER_REQUEST} USDC via x402",
@@ -153,34 +185,22 @@ async def get_prices(request: Request, symbols: str = "btc,eth,sol"):
 
     symbol_list = [s.strip().lower() for s in symbols.split(",")]
 
-    coingecko_ids = {
-        "btc": "bitcoin",
-        "eth": "ethereum",
-        "usdc": "usd-coin",
-        "sol": "solana",
-        "matic": "matic-network",
-    }
-
-    cg_ids = [coingecko_ids.get(s, s) for s in symbol_list]
+    cg_ids = [COINGECKO_IDS.get(s, s) for s in symbol_list]
 
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"https://api.coingecko.com/api/v3/simple/price?ids={','.join(cg_ids)}&vs_currencies=usd"
-            )
-            data = resp.json()
+        data = await fetch_prices(tuple(cg_ids))
 
-            results = {}
-            for symbol, cg_id in zip(symbol_list, cg_ids, strict=False):
-                if cg_id in data:
-                    results[symbol.upper()] = data[cg_id].get("usd")
-
-            return {
-                "prices": results,
-                "timestamp": "2026-02-03T03:58:00Z",
-                "paid": True,
-                "cost_usdc": PRICE_PER_REQUEST,
-            }
+        results = {}
+        for symbol, cg_id in zip(symbol_list, cg_ids, strict=False):
+            if cg_id in data:
+                results[symbol.upper()] = data[cg_id].get("usd")
+
+        return {
+            "prices": results,
+            "timestamp": utc_now_iso(),
+            "paid": True,
+            "cost_usdc": PRICE_PER_REQUEST,
+        }
 
     except Exception as e:
         return {"error": str(e), "paid": True}
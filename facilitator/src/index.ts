@@ -270,6 +270,55 @@ app.post("/settle", async (req, res) => {
   }
 });
 
+// POST /verify-and-settle - verify, then settle if valid, in one round trip
+app.post("/verify-and-settle", async (req, res) => {
+  try {
+    const { paymentPayload, paymentRequirements } = req.body as {
+      paymentPayload: PaymentPayload;
+      paymentRequirements: PaymentRequirements;
+    };
+
+    if (!paymentPayload || !paymentRequirements) {
+      return res.status(400).json({
+        error: "Missing paymentPayload or paymentRequirements",
+      });
+    }
+
+    const verify: VerifyResponse = await facilitator.verify(
+      paymentPayload,
+      paymentRequirements
+    );
+    if (!verify.isValid) {
+      return res.json({ verify });
+    }
+
+    try {
+      const settle: SettleResponse = await facilitator.settle(
+        paymentPayload,
+        paymentRequirements
+      );
+      res.json({ verify, settle });
+    } catch (error) {
+      if (error instanceof Error && error.message.includes("Settlement aborted:")) {
+        return res.json({
+          verify,
+          settle: {
+            success: false,
+            errorReason: error.message.replace("Settlement aborted: ", ""),
+            network: paymentPayload.network || "unknown",
+          } as SettleResponse,
+        });
+      }
+      throw error;
+    }
+  } catch (error) {
+    console.error("Verify-and-settle error:", error);
+    res.status(500).json({
+      error: error instanceof Error ? error.message : "Unknown error",
+    });
+  }
+});
+
 // GET /supported
 app.get("/supported", async (req, res) => {
   try {
@@ -303,7 +352,7 @@ app.get("/", async (_req, res) => {
   res.json({
     name: "MoltMart x402 Facilitator",
     network: BASE_NETWORK,
-    endpoints: ["POST /verify", "POST /settle", "GET /supported", "GET /health"],
+    endpoints: ["POST /verify", "POST /settle", "POST /verify-and-settle", "GET /supported", "GET /health"],
   });
 });
 
@@ -313,5 +362,5 @@ app.listen(parseInt(PORT), "0.0.0.0", () => {
   console.log(`   Network: ${BASE_NETWORK} (Base ${USE_TESTNET ? "Sepolia" : "Mainnet"})`);
   console.log(`   Wallet: ${account.address}`);
   console.log(`   USDC: ${BASE_USDC}`);
-  console.log(`   Endpoints: POST /verify, POST /settle, GET /supported, GET /health\n`);
+  console.log(`   Endpoints: POST /verify, POST /settle, POST /verify-and-settle, GET /supported, GET /health\n`);
 });
@@ -7,7 +7,11 @@ import { privateKeyToAccount } from 'viem/accounts';
 import fs from 'fs';
 import path from 'path';
 
-const challenge = process.argv[2] || "MoltMart Registration: I own this wallet and have an ERC-8004 identity";
+const challenge = process.argv[2];
+if (!challenge) {
+  console.error('Usage: node sign-challenge.mjs "challenge message" (get it from GET /agents/challenge)');
+  process.exit(1);
+}
 
 // Load private key
 const keyPath = path.join(process.env.HOME, '.openclaw/workspace/.kyro-wallet-key');